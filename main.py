@@ -1,17 +1,18 @@
 import sys
 import os
 from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QTimer
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "views")))
 from views.login_view import LoginDialog
 from views.main_view import MainView
 from views.login_view import LoginDialog
 from views.main_view import MainView
-from models.mock_stock_model import MockStockModel
+from models.async_stock_model import AsyncStockModel
 from presenters.login_presenter import LoginPresenter
 
 def main():
     app = QApplication(sys.argv)
-    model = MockStockModel()
+    model = AsyncStockModel()
 
 
     # הצגת חלון ההתחברות
@@ -19,6 +20,10 @@ def main():
     login_presenter = LoginPresenter(login_dialog, model)
     login_dialog.set_presenter(login_presenter)
 
+    # Load the AI advisor knowledge base in the background once the login
+    # window is on screen - logging in never waits for it
+    QTimer.singleShot(500, model.start_rag_init)
+
 
     if login_dialog.exec() == LoginDialog.Accepted:
         username = login_dialog.get_username()  # קבלת שם המשתמש
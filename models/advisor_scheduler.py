@@ -0,0 +1,127 @@
+import statistics
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class AdvisorQueueFull(Exception):
+    """Raised when too many advisor questions are already waiting for the LLM"""
+
+
+class AdvisorScheduler:
+    """
+    Shares the LLM and the embedding model between concurrent advisor questions
+
+    At most max_concurrent questions are sent to the LLM at once, and at most
+    max_queue more wait for a slot - beyond that acquire() raises
+    AdvisorQueueFull instead of piling more work onto Ollama. Query embeddings
+    are micro-batched: questions arriving within batch_window_ms of each other
+    while others are in flight are embedded in one forward pass.
+    """
+
+    def __init__(self, embed_batch, max_concurrent=2, max_queue=8, batch_window_ms=15, max_batch=16):
+        self.embed_batch = embed_batch   # Callable: list of texts -> list of vectors
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.batch_window_ms = batch_window_ms
+        self.max_batch = max_batch
+
+        self._condition = threading.Condition()
+        self._running = 0
+        self._waiting = 0
+        self.rejected = 0
+        self._queue_ms = deque(maxlen=200)
+
+        self._batch_lock = threading.Lock()
+        self._pending = []        # (text, Future) waiting to be embedded
+        self._batching = False    # Whether a thread is embedding the pending texts
+        self._batch_sizes = deque(maxlen=200)
+
+    def acquire(self, cancel_token=None):
+        """
+        Wait for an LLM slot
+        Returns the milliseconds spent waiting, or None if cancel_token was
+        cancelled while waiting. Every successful acquire() needs a release().
+        """
+        start_time = time.perf_counter()
+        with self._condition:
+            if self._running >= self.max_concurrent and self._waiting >= self.max_queue:
+                self.rejected += 1
+                raise AdvisorQueueFull(f"{self._waiting} advisor questions are already waiting")
+            self._waiting += 1
+            try:
+                while self._running >= self.max_concurrent:
+                    if cancel_token and cancel_token.cancelled:
+                        return None
+                    # Wake up now and then to notice a cancel
+                    self._condition.wait(0.1)
+            finally:
+                self._waiting -= 1
+            self._running += 1
+            queue_ms = (time.perf_counter() - start_time) * 1000
+            self._queue_ms.append(queue_ms)
+        return queue_ms
+
+    def release(self):
+        """Give back an LLM slot taken with acquire()"""
+        with self._condition:
+            self._running -= 1
+            self._condition.notify()
+
+    def embed_query(self, text):
+        """
+        Embed a question, batched with other questions embedded at the same time
+        The first caller embeds the batch for everyone and the others wait.
+        """
+        future = Future()
+        with self._batch_lock:
+            self._pending.append((text, future))
+            lead = not self._batching
+            self._batching = True
+        if lead:
+            self._run_batches()
+        return future.result()
+
+    def _run_batches(self):
+        """Embed pending texts in batches until none are left"""
+        with self._condition:
+            busy = self._running + self._waiting > 0
+        if busy:
+            # Other questions are in flight, so give them a moment to join the batch
+            time.sleep(self.batch_window_ms / 1000)
+
+        while True:
+            with self._batch_lock:
+                batch = self._pending[:self.max_batch]
+                del self._pending[:self.max_batch]
+                if not batch:
+                    self._batching = False
+                    return
+            self._batch_sizes.append(len(batch))
+            try:
+                vectors = self.embed_batch([text for text, _ in batch])
+                for (_, future), vector in zip(batch, vectors):
+                    future.set_result(vector)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+
+    def stats(self):
+        """Return queue and batching counters as a dict"""
+        with self._condition:
+            queue_ms = sorted(self._queue_ms)
+            stats = {
+                "running": self._running,
+                "waiting": self._waiting,
+                "max_concurrent": self.max_concurrent,
+                "max_queue": self.max_queue,
+                "rejected": self.rejected,
+                "median_queue_ms": round(statistics.median(queue_ms), 1) if queue_ms else None,
+                "p95_queue_ms": round(queue_ms[min(len(queue_ms) - 1, int(len(queue_ms) * 0.95))], 1)
+                if queue_ms else None,
+            }
+        batch_sizes = list(self._batch_sizes)
+        stats["embedding_batches"] = len(batch_sizes)
+        stats["mean_batch_size"] = round(sum(batch_sizes) / len(batch_sizes), 2) if batch_sizes else None
+        return stats
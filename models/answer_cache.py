@@ -0,0 +1,130 @@
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+
+
+class AnswerCache:
+    """
+    Semantic cache of AI advisor answers, persisted to disk
+
+    Answers are keyed on the L2-normalized embedding of the question. A new
+    question whose cosine similarity to a cached one is at least `threshold`
+    gets the cached answer, as long as its scope matches. The scope is an
+    opaque string (e.g. a hash of the knowledge base and the user context), so
+    answers are never reused after the knowledge base changes. The cache holds
+    at most `max_entries` answers and evicts the least recently used one.
+    """
+
+    def __init__(self, path, threshold=0.92, max_entries=200):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+
+        self._entries = []    # dicts with query, answer, scope, last_used
+        self._vectors = None  # float32 matrix, one normalized row per entry
+        self._lock = threading.Lock()
+
+        # Counters for tuning
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._load()
+
+    def lookup(self, query_vector, scope):
+        """
+        Find a cached answer for a question
+        Returns a tuple of (answer, similarity), or (None, best similarity) on a miss.
+        """
+        query_vector = self._normalize(query_vector)
+        with self._lock:
+            best_index, best_similarity = None, 0.0
+            if self._entries and self._vectors.shape[1] == len(query_vector):
+                # Answers cached with another embedding model never match
+                similarities = self._vectors @ query_vector
+                for i, entry in enumerate(self._entries):
+                    if entry["scope"] == scope and similarities[i] > best_similarity:
+                        best_index, best_similarity = i, float(similarities[i])
+
+            if best_index is None or best_similarity < self.threshold:
+                self.misses += 1
+                return None, best_similarity
+
+            self.hits += 1
+            entry = self._entries[best_index]
+            entry["last_used"] = time.time()
+            return entry["answer"], best_similarity
+
+    def store(self, query, query_vector, answer, scope):
+        """Add an answer and write the cache to disk"""
+        query_vector = self._normalize(query_vector)
+        with self._lock:
+            entry = {"query": query, "answer": answer, "scope": scope, "last_used": time.time()}
+            if self._vectors is None or self._vectors.shape[1] != len(query_vector):
+                # First entry, or the embedding model changed
+                self._entries = [entry]
+                self._vectors = query_vector[np.newaxis, :]
+            else:
+                self._entries.append(entry)
+                self._vectors = np.vstack([self._vectors, query_vector])
+
+            while len(self._entries) > self.max_entries:
+                oldest = min(range(len(self._entries)), key=lambda i: self._entries[i]["last_used"])
+                del self._entries[oldest]
+                self._vectors = np.delete(self._vectors, oldest, axis=0)
+                self.evictions += 1
+
+            self._save()
+
+    def clear(self):
+        """Remove every answer, including the file on disk"""
+        with self._lock:
+            self._entries = []
+            self._vectors = None
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def stats(self):
+        """Return the cache counters as a dict"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    @staticmethod
+    def _normalize(vector):
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                data = pickle.load(f)
+            self._entries = data["entries"]
+            self._vectors = data["vectors"]
+            print(f"💾 Loaded {len(self._entries)} cached answers from {self.path}")
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable answer cache {self.path}: {e}")
+            self._entries, self._vectors = [], None
+
+    def _save(self):
+        """Write to a temporary file first so a crash never corrupts the cache"""
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump({"entries": self._entries, "vectors": self._vectors}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"⚠️ Could not save the answer cache: {e}")
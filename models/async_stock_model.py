@@ -0,0 +1,221 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import aiohttp
+
+from models.mock_stock_model import MockStockModel
+from models.quote_cache import EstimatedPrice
+
+
+class AsyncStockModel(MockStockModel):
+    """
+    MockStockModel variant with asyncio versions of the read-heavy API calls
+
+    All coroutine methods share one aiohttp session, so a single event loop
+    thread (see presenters.async_worker.AsyncLoopThread) can keep dozens of
+    requests in flight. The quote cache and history store are shared with the
+    synchronous methods, which are all still available.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._aio_session = None
+
+    async def _get_session(self):
+        """Create the aiohttp session lazily, inside the running event loop"""
+        if self._aio_session is None or self._aio_session.closed:
+            connect_timeout, read_timeout = self.backend.timeout
+            self._aio_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.price_fetch_max_workers * 4, keepalive_timeout=30),
+                timeout=aiohttp.ClientTimeout(sock_connect=connect_timeout, sock_read=read_timeout)
+            )
+        return self._aio_session
+
+    async def close_async(self):
+        """Close the aiohttp session and its pooled connections"""
+        if self._aio_session is not None and not self._aio_session.closed:
+            await self._aio_session.close()
+
+    async def _get_json_async(self, path, **kwargs):
+        """GET a backend path. Returns (status_code, parsed JSON or text)."""
+        session = await self._get_session()
+        async with session.get(f"{self.api_base_url}{path}", **kwargs) as response:
+            if response.status == 200 and response.content_type == "application/json":
+                return response.status, await response.json()
+            return response.status, await response.text()
+
+    async def get_portfolio_data_async(self):
+        """Coroutine version of get_portfolio_data"""
+        user_id = getattr(self, "user_id", 1)
+
+        try:
+            status, portfolio_items = await self._get_json_async(f"/transaction/queries/portfolio/{user_id}")
+            if status != 200:
+                print(f"Failed to get portfolio data: {status} - {portfolio_items}")
+                portfolio_items = []
+        except Exception as e:
+            print(f"Error getting portfolio data: {e}")
+            portfolio_items = []
+
+        symbols = [item.get("Symbol") or item.get("symbol") for item in portfolio_items]
+        prices = await self.get_current_prices_async(symbols)
+
+        return self._build_portfolio_rows(portfolio_items, prices)
+
+    async def get_current_prices_async(self, symbols, allow_stale=True):
+        """Coroutine version of get_current_prices"""
+        unique_symbols = [s for s in dict.fromkeys(symbols) if s]
+        prices = {}
+
+        to_fetch = []
+        for symbol in unique_symbols:
+            value = self.quote_cache.get_cached(symbol, self._fetch_current_price, allow_stale)
+            if value is not None:
+                prices[symbol] = value
+            else:
+                to_fetch.append(symbol)
+
+        if to_fetch and self.batch_quotes_supported is not False:
+            batch_prices = await self._fetch_batch_prices_async(to_fetch)
+            for symbol, price in batch_prices.items():
+                self.quote_cache.put(symbol, price)
+            prices.update(batch_prices)
+
+        missing = [s for s in to_fetch if s not in prices]
+        if missing:
+            # Same bounded fan-out as the threaded version, but on one loop
+            semaphore = asyncio.Semaphore(self.price_fetch_max_workers)
+
+            async def fetch(symbol):
+                async with semaphore:
+                    try:
+                        price = await asyncio.wait_for(
+                            self._fetch_current_price_async(symbol), self.price_fetch_timeout
+                        )
+                    except asyncio.TimeoutError:
+                        print(f"Price fetch for {symbol} timed out after {self.price_fetch_timeout}s, using default price")
+                        return symbol, EstimatedPrice(100.0)
+                    self.quote_cache.put(symbol, price)
+                    return symbol, price
+
+            prices.update(await asyncio.gather(*(fetch(symbol) for symbol in missing)))
+
+        return prices
+
+    async def _fetch_batch_prices_async(self, symbols):
+        """Coroutine version of _fetch_batch_prices"""
+        try:
+            status, data = await self._get_json_async(
+                "/stock/queries/prices", params={"symbols": ",".join(symbols)}
+            )
+            if status in (404, 405, 501):
+                print(f"Batch price endpoint not supported ({status}), using per-symbol calls")
+                self.batch_quotes_supported = False
+                return {}
+            if status != 200:
+                print(f"Batch price API error: {status} - {data}")
+                return {}
+
+            self.batch_quotes_supported = True
+            return self._parse_batch_prices(data)
+        except Exception as e:
+            print(f"Error getting batch prices: {str(e)}")
+            return {}
+
+    async def get_current_price_async(self, symbol, allow_stale=True):
+        """Coroutine version of get_current_price"""
+        value = self.quote_cache.get_cached(symbol, self._fetch_current_price, allow_stale)
+        if value is not None:
+            return value
+
+        price = await self._fetch_current_price_async(symbol)
+        self.quote_cache.put(symbol, price)
+        return price
+
+    async def _fetch_current_price_async(self, symbol):
+        """Coroutine version of _fetch_current_price"""
+        try:
+            status, price_data = await self._get_json_async(f"/stock/queries/price/{symbol}")
+            if status == 200:
+                price = self._parse_price(symbol, price_data)
+                if price is not None:
+                    return price
+            else:
+                print(f"API error for {symbol} price: {status} - {price_data}")
+        except Exception as e:
+            print(f"Error getting current price for {symbol}: {str(e)}")
+
+        # Fall back to the latest close from the history API
+        try:
+            raw_history = await self.get_stock_history_async(symbol)
+            if raw_history:
+                return EstimatedPrice(raw_history[-1][1])
+        except Exception as history_error:
+            print(f"Error getting historical price: {history_error}")
+
+        return EstimatedPrice(100.0)
+
+    async def get_stock_history_async(self, symbol, start_date=None, end_date=None):
+        """Coroutine version of get_stock_history"""
+        try:
+            start_date = start_date or (datetime.now() - timedelta(days=365)).strftime("%Y-%m-%d")
+            end_date = end_date or datetime.now().strftime("%Y-%m-%d")
+
+            # SQLite and the synthetic walk are blocking, so keep them off the event loop
+            fetch_failed = False
+            missing_ranges = await asyncio.to_thread(self.history_store.missing_ranges, symbol, start_date, end_date)
+            for range_start, range_end in missing_ranges:
+                bars = await self._fetch_history_bars_async(symbol, range_start, range_end)
+                if bars is None:
+                    fetch_failed = True
+                    break
+                await asyncio.to_thread(self.history_store.save_bars, symbol, bars, range_start, range_end)
+
+            chart_data = await asyncio.to_thread(self.history_store.load_bars, symbol, start_date, end_date)
+            if chart_data or not fetch_failed:
+                return chart_data
+
+            return await asyncio.to_thread(self.generate_mock_history, symbol, start_date, end_date)
+
+        except Exception as e:
+            print(f"Error getting stock history: {str(e)}")
+            return await asyncio.to_thread(self.generate_mock_history, symbol, start_date, end_date)
+
+    async def _fetch_history_bars_async(self, symbol, start_date, end_date):
+        """Coroutine version of _fetch_history_bars. Returns None on failure."""
+        try:
+            status, records = await self._get_json_async(
+                f"/stock/queries/yahoo-history/{symbol}",
+                params={"from": start_date, "to": end_date}
+            )
+            if status != 200:
+                print(f"API error: {status} - {records}")
+                return None
+            return self._parse_history_records(records)
+        except Exception as e:
+            print(f"Error fetching history for {symbol}: {str(e)}")
+            return None
+
+    async def get_company_profile_async(self, symbol):
+        """Coroutine version of get_company_profile"""
+        try:
+            status, profile = await self._get_json_async(f"/stock/queries/profile/{symbol}")
+            if status == 200 and isinstance(profile, dict):
+                return profile
+            print(f"API error for {symbol} profile: {status} - {profile}")
+        except Exception as e:
+            print(f"Error getting company profile for {symbol}: {str(e)}")
+        return self._default_company_profile(symbol)
+
+    async def get_company_description_async(self, symbol):
+        """Coroutine version of get_company_description"""
+        try:
+            session = await self._get_session()
+            async with session.get(f"{self.api_base_url}/stock/queries/description/{symbol}") as response:
+                text = await response.text()
+                if response.status == 200:
+                    return text.strip('"')  # Remove quotes if the API returns JSON string
+                print(f"API error for {symbol} description: {response.status} - {text}")
+        except Exception as e:
+            print(f"Error getting company description for {symbol}: {str(e)}")
+        return "No company description available."
@@ -0,0 +1,55 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class BackendClient:
+    """
+    Shared HTTP client for the backend API
+
+    Wraps a single requests.Session so every call reuses keep-alive connections
+    from one pool instead of opening a new TCP connection. Adds default
+    connect/read timeouts to every request and retries idempotent requests
+    (GET/HEAD) with exponential backoff on connection errors and 502/503/504.
+    """
+
+    def __init__(self, base_url, pool_size=16, connect_timeout=3.05, read_timeout=15.0,
+                 retries=3, backoff_factor=0.3):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            raise_on_status=False,  # Hand the last response back instead of raising
+        )
+        # pool_maxsize is the number of connections kept alive per host, so it
+        # should be at least the number of worker threads calling the backend
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method, url, **kwargs):
+        """Send a request through the pooled session with the default timeout"""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, self._full_url(url), **kwargs)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+
+    def _full_url(self, url):
+        """Accept either a full URL or a path relative to the base URL"""
+        if url.startswith("http://") or url.startswith("https://"):
+            return url
+        return f"{self.base_url}/{url.lstrip('/')}"
@@ -0,0 +1,50 @@
+# Parsing and chunking of knowledge base files. Kept separate from
+# knowledge_base.py so process pool workers only import what they need to
+# parse documents.
+
+# PDFs are split into page ranges, so one large PDF can be parsed by several
+# processes at once
+PAGES_PER_TASK = 16
+
+
+def plan_parse_tasks(path, pages_per_task=PAGES_PER_TASK):
+    """
+    Split a file into parse tasks
+    Returns a list of (path, first_page, end_page) tuples. Text files are a
+    single task with both pages set to None.
+    """
+    if not path.lower().endswith(".pdf"):
+        return [(path, None, None)]
+
+    from pypdf import PdfReader
+    page_count = len(PdfReader(path).pages)
+    return [
+        (path, start, min(start + pages_per_task, page_count))
+        for start in range(0, page_count, pages_per_task)
+    ]
+
+
+def parse_task(path, first_page, end_page, chunk_size, chunk_overlap, separator):
+    """
+    Parse one task from plan_parse_tasks and split it into chunks
+    Returns a list of (text, metadata) tuples.
+    """
+    from langchain_core.documents import Document
+    from langchain.text_splitter import CharacterTextSplitter
+
+    if first_page is None:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            documents = [Document(page_content=f.read(), metadata={"source": path})]
+    else:
+        from pypdf import PdfReader
+        reader = PdfReader(path)
+        # Same metadata as PyPDFLoader: one document per page
+        documents = [
+            Document(page_content=reader.pages[page].extract_text(), metadata={"source": path, "page": page})
+            for page in range(first_page, end_page)
+        ]
+
+    text_splitter = CharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap, separator=separator
+    )
+    return [(chunk.page_content, chunk.metadata) for chunk in text_splitter.split_documents(documents)]
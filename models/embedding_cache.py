@@ -0,0 +1,173 @@
+import hashlib
+import json
+import os
+import threading
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+
+VECTORS_FILE = "vectors.f32"
+KEYS_FILE = "keys.txt"
+META_FILE = "meta.json"
+
+
+class EmbeddingCache:
+    """
+    Content-addressed store of embedding vectors for one embedding model
+
+    Vectors are appended as raw float32 rows to one file, which is read through
+    a read-only memory map, so a large cache costs almost no memory. A text file
+    next to it holds one key per row. The key is a hash of the model name and
+    the text, so identical chunks and repeated queries are embedded only once.
+    """
+
+    def __init__(self, cache_dir, model_name):
+        self.model_name = model_name
+        model_key = hashlib.sha256(model_name.encode()).hexdigest()[:16]
+        self.cache_dir = os.path.join(cache_dir, model_key)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        self.dim = None
+        self._rows = {}        # key -> row number
+        self._vectors = None   # read-only np.memmap of shape (rows, dim)
+        self._lock = threading.Lock()
+
+        # Counters for tuning
+        self.hits = 0
+        self.misses = 0
+
+        self._load()
+
+    def key(self, text):
+        return hashlib.sha256(f"{self.model_name}\0{text}".encode()).hexdigest()[:32]
+
+    def get_many(self, texts):
+        """Return a list with the cached vector for each text, or None where there is none"""
+        keys = [self.key(text) for text in texts]
+        with self._lock:
+            results = []
+            for key in keys:
+                row = self._rows.get(key)
+                if row is None:
+                    self.misses += 1
+                    results.append(None)
+                else:
+                    self.hits += 1
+                    results.append(self._vectors[row].tolist())
+            return results
+
+    def put_many(self, texts, vectors):
+        """Append vectors for texts that aren't cached yet"""
+        if not texts:
+            return
+        matrix = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            if self.dim is None:
+                self.dim = matrix.shape[1]
+                with open(os.path.join(self.cache_dir, META_FILE), "w") as f:
+                    json.dump({"model_name": self.model_name, "dim": self.dim}, f)
+
+            new_keys, new_rows = [], []
+            for text, row in zip(texts, matrix):
+                key = self.key(text)
+                if key not in self._rows and key not in new_keys:
+                    new_keys.append(key)
+                    new_rows.append(row)
+            if not new_keys:
+                return
+
+            # Vectors first, then keys - a crash in between leaves rows without
+            # keys, which _load() cuts off
+            first_row = len(self._rows)
+            with open(os.path.join(self.cache_dir, VECTORS_FILE), "ab") as f:
+                f.write(np.vstack(new_rows).tobytes())
+            with open(os.path.join(self.cache_dir, KEYS_FILE), "a") as f:
+                f.write("".join(f"{key}\n" for key in new_keys))
+
+            for i, key in enumerate(new_keys):
+                self._rows[key] = first_row + i
+            self._map_vectors()
+
+    def stats(self):
+        """Return the cache counters as a dict"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._rows),
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _load(self):
+        meta_path = os.path.join(self.cache_dir, META_FILE)
+        keys_path = os.path.join(self.cache_dir, KEYS_FILE)
+        vectors_path = os.path.join(self.cache_dir, VECTORS_FILE)
+        if not (os.path.exists(meta_path) and os.path.exists(keys_path) and os.path.exists(vectors_path)):
+            return
+
+        with open(meta_path) as f:
+            self.dim = json.load(f)["dim"]
+        with open(keys_path) as f:
+            keys = [line.strip() for line in f if line.strip()]
+
+        row_bytes = self.dim * 4
+        rows = min(len(keys), os.path.getsize(vectors_path) // row_bytes)
+        if rows < len(keys) or os.path.getsize(vectors_path) != rows * row_bytes:
+            # Interrupted write - drop the incomplete tail
+            print(f"⚠️ Repairing embedding cache in {self.cache_dir}")
+            keys = keys[:rows]
+            with open(vectors_path, "r+b") as f:
+                f.truncate(rows * row_bytes)
+            with open(keys_path, "w") as f:
+                f.write("".join(f"{key}\n" for key in keys))
+
+        self._rows = {key: row for row, key in enumerate(keys)}
+        self._map_vectors()
+        print(f"🧮 Loaded {len(self._rows)} cached embeddings")
+
+    def _map_vectors(self):
+        if self._rows:
+            self._vectors = np.memmap(
+                os.path.join(self.cache_dir, VECTORS_FILE), dtype=np.float32, mode="r",
+                shape=(len(self._rows), self.dim)
+            )
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that only computes vectors missing from an EmbeddingCache
+
+    Used for both indexing and querying, so re-indexing an edited PDF only
+    embeds the chunks whose text changed.
+    """
+
+    def __init__(self, embeddings, cache):
+        self.embeddings = embeddings
+        self.cache = cache
+
+    @property
+    def model(self):
+        """The underlying model - accessing it loads it"""
+        return self.embeddings.model
+
+    def embed_documents(self, texts):
+        vectors = self.cache.get_many(texts)
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            # Repeated texts (e.g. page headers) are embedded once
+            missing_texts = list(dict.fromkeys(texts[i] for i in missing))
+            new_vectors = self.embeddings.embed_documents(missing_texts)
+            self.cache.put_many(missing_texts, new_vectors)
+            by_text = {text: list(vector) for text, vector in zip(missing_texts, new_vectors)}
+            for i in missing:
+                vectors[i] = by_text[texts[i]]
+        return vectors
+
+    def embed_query(self, text):
+        vector = self.cache.get_many([text])[0]
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put_many([text], [vector])
+        return vector
@@ -0,0 +1,107 @@
+import os
+import sqlite3
+import threading
+
+
+class HistoryStore:
+    """
+    Local SQLite store for daily closing prices
+
+    For every symbol it keeps the bars fetched so far plus the contiguous date
+    range they cover, so callers only need to request the dates outside of it.
+    Dates are ISO "YYYY-MM-DD" strings, bars are (timestamp_ms, close) tuples
+    like the ones returned by MockStockModel.get_stock_history.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS bars (
+                    symbol TEXT NOT NULL,
+                    day TEXT NOT NULL,
+                    timestamp INTEGER NOT NULL,
+                    close REAL NOT NULL,
+                    PRIMARY KEY (symbol, day)
+                )
+            """)
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS coverage (
+                    symbol TEXT PRIMARY KEY,
+                    start_day TEXT NOT NULL,
+                    end_day TEXT NOT NULL
+                )
+            """)
+
+    def get_coverage(self, symbol):
+        """Return (start_day, end_day) already stored for a symbol, or None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT start_day, end_day FROM coverage WHERE symbol = ?", (symbol,)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def missing_ranges(self, symbol, start_day, end_day):
+        """
+        Return the list of (start_day, end_day) ranges that still have to be
+        fetched to cover the requested range. Ranges always touch the stored
+        coverage so it stays contiguous. The last stored day is fetched again
+        because its bar may have been incomplete when it was saved.
+        """
+        coverage = self.get_coverage(symbol)
+        if coverage is None:
+            return [(start_day, end_day)]
+
+        covered_start, covered_end = coverage
+        ranges = []
+        if start_day < covered_start:
+            ranges.append((start_day, covered_start))
+        if end_day >= covered_end:
+            ranges.append((covered_end, end_day))
+        return ranges
+
+    def save_bars(self, symbol, bars, start_day, end_day):
+        """
+        Store fetched bars and extend the coverage with the range they were
+        requested for. `bars` is a list of (day, timestamp_ms, close) tuples.
+        """
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO bars (symbol, day, timestamp, close) VALUES (?, ?, ?, ?)",
+                [(symbol, day, timestamp, close) for day, timestamp, close in bars]
+            )
+            row = self._conn.execute(
+                "SELECT start_day, end_day FROM coverage WHERE symbol = ?", (symbol,)
+            ).fetchone()
+            if row:
+                start_day = min(start_day, row[0])
+                end_day = max(end_day, row[1])
+            self._conn.execute(
+                "INSERT OR REPLACE INTO coverage (symbol, start_day, end_day) VALUES (?, ?, ?)",
+                (symbol, start_day, end_day)
+            )
+
+    def load_bars(self, symbol, start_day, end_day):
+        """Return stored (timestamp_ms, close) bars between two days, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT timestamp, close FROM bars WHERE symbol = ? AND day BETWEEN ? AND ? ORDER BY day",
+                (symbol, start_day, end_day)
+            ).fetchall()
+        return [(timestamp, close) for timestamp, close in rows]
+
+    def clear(self, symbol=None):
+        """Forget the stored history for one symbol, or for all symbols"""
+        with self._lock, self._conn:
+            if symbol is None:
+                self._conn.execute("DELETE FROM bars")
+                self._conn.execute("DELETE FROM coverage")
+            else:
+                self._conn.execute("DELETE FROM bars WHERE symbol = ?", (symbol,))
+                self._conn.execute("DELETE FROM coverage WHERE symbol = ?", (symbol,))
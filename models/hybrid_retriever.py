@@ -0,0 +1,217 @@
+import math
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+
+# Keeps finance terms like "p/e", "10-k", "s&p" and "0.50" as single tokens
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[/.&'-][a-z0-9]+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how i in is it its of on or should "
+    "that the their this to was what when which why will with you your".split()
+)
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+class BM25Index:
+    """
+    In-memory inverted index with Okapi BM25 scoring
+
+    Documents can be added and removed one at a time, so the index can follow
+    the knowledge base without being rebuilt.
+    """
+
+    def __init__(self, k1=1.5, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings = defaultdict(dict)   # term -> {doc_id: term frequency}
+        self._lengths = {}                   # doc_id -> number of tokens
+        self._doc_terms = {}                 # doc_id -> its distinct terms
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._lengths
+
+    def doc_ids(self):
+        return self._lengths.keys()
+
+    def add(self, doc_id, text):
+        if doc_id in self._lengths:
+            self.remove(doc_id)
+        terms = Counter(tokenize(text))
+        for term, frequency in terms.items():
+            self._postings[term][doc_id] = frequency
+        length = sum(terms.values())
+        self._lengths[doc_id] = length
+        self._doc_terms[doc_id] = list(terms)
+        self._total_length += length
+
+    def remove(self, doc_id):
+        length = self._lengths.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_length -= length
+        for term in self._doc_terms.pop(doc_id):
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+
+    def search(self, query, k=20):
+        """Return up to k (doc_id, score) tuples, best first"""
+        count = len(self._lengths)
+        if not count:
+            return []
+        average_length = self._total_length / count
+
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[doc_id] / average_length)
+                scores[doc_id] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """
+    Merge several ranked lists of IDs into one
+    Each ID scores sum(1 / (k + rank)) over the lists it appears in.
+    """
+    scores = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] += 1.0 / (k + rank)
+    return sorted(scores, key=scores.get, reverse=True)
+
+
+class HybridRetriever:
+    """
+    Combines BM25 keyword search and FAISS vector search over a KnowledgeBase
+
+    Both result lists are merged with reciprocal rank fusion, which helps with
+    exact terms like tickers and "P/E" that a small embedding model blurs.
+    Optionally a cross-encoder reranks the fused candidates, but only as many
+    as fit in `rerank_budget_ms`. Candidates it didn't get to keep their fused
+    order, after the reranked ones.
+    """
+
+    def __init__(self, knowledge_base, embeddings, candidates=20, rerank_model=None,
+                 rerank_budget_ms=150, rerank_batch_size=8):
+        self.knowledge_base = knowledge_base
+        self.embeddings = embeddings
+        self.candidates = candidates
+        self.rerank_model = rerank_model
+        self.rerank_budget_ms = rerank_budget_ms
+        self.rerank_batch_size = rerank_batch_size
+
+        self.bm25 = BM25Index()
+        self._bm25_key = None
+        self._lock = threading.Lock()
+        self._cross_encoder = None
+        self._cross_encoder_loading = False
+        self._ms_per_pair = None   # Measured cross-encoder cost, used to plan batches
+
+    def refresh(self):
+        """Bring the BM25 index in line with the knowledge base. Cheap if nothing changed."""
+        with self._lock:
+            content_key = self.knowledge_base.content_key
+            if content_key == self._bm25_key:
+                return
+            start_time = time.time()
+            current_ids = self.knowledge_base.document_ids()
+            for doc_id in [doc_id for doc_id in self.bm25.doc_ids() if doc_id not in current_ids]:
+                self.bm25.remove(doc_id)
+            new_ids = [doc_id for doc_id in current_ids if doc_id not in self.bm25]
+            for doc_id, doc in self.knowledge_base.get_documents(new_ids).items():
+                self.bm25.add(doc_id, doc.page_content)
+            self._bm25_key = content_key
+            print(f"🔤 BM25 index updated with {len(new_ids)} chunks ({len(self.bm25)} total) "
+                  f"in {time.time() - start_time:.2f} seconds")
+
+    def search(self, query, k=5, query_vector=None):
+        """Return the k best chunks for the query as Documents"""
+        self.refresh()
+        if query_vector is None:
+            query_vector = self.embeddings.embed_query(query)
+
+        vector_hits = self.knowledge_base.vector_search(query_vector, self.candidates)
+        with self._lock:
+            keyword_hits = self.bm25.search(query, self.candidates)
+
+        fused = reciprocal_rank_fusion([
+            [doc_id for doc_id, _ in vector_hits],
+            [doc_id for doc_id, _ in keyword_hits],
+        ])
+        documents = dict(vector_hits)
+        documents.update(self.knowledge_base.get_documents(
+            [doc_id for doc_id in fused if doc_id not in documents]
+        ))
+        fused = [doc_id for doc_id in fused if doc_id in documents]
+
+        if self.rerank_model:
+            fused = self._rerank(query, fused, documents)
+        return [documents[doc_id] for doc_id in fused[:k]]
+
+    def _rerank(self, query, doc_ids, documents):
+        """Rerank as many candidates as the latency budget allows"""
+        cross_encoder = self._get_cross_encoder()
+        if cross_encoder is None:
+            return doc_ids
+
+        start_time = time.perf_counter()
+        scored = []
+        position = 0
+        while position < len(doc_ids):
+            elapsed_ms = (time.perf_counter() - start_time) * 1000
+            remaining_ms = self.rerank_budget_ms - elapsed_ms
+            batch_size = self.rerank_batch_size
+            if self._ms_per_pair:
+                batch_size = min(batch_size, int(remaining_ms / self._ms_per_pair))
+            if batch_size <= 0:
+                break
+
+            batch = doc_ids[position:position + batch_size]
+            batch_start = time.perf_counter()
+            scores = cross_encoder.predict([(query, documents[doc_id].page_content) for doc_id in batch])
+            self._ms_per_pair = (time.perf_counter() - batch_start) * 1000 / len(batch)
+            scored += zip(batch, scores)
+            position += len(batch)
+
+        scored.sort(key=lambda item: item[1], reverse=True)
+        print(f"🎯 Reranked {len(scored)}/{len(doc_ids)} candidates in "
+              f"{(time.perf_counter() - start_time) * 1000:.0f} ms")
+        return [doc_id for doc_id, _ in scored] + doc_ids[position:]
+
+    def _get_cross_encoder(self):
+        """
+        Return the cross-encoder, or None while it is loading
+        The model is loaded on a background thread, so a query never waits for it.
+        """
+        if self._cross_encoder is not None:
+            return self._cross_encoder
+        with self._lock:
+            if not self._cross_encoder_loading:
+                self._cross_encoder_loading = True
+                threading.Thread(target=self._load_cross_encoder, name="cross-encoder-load", daemon=True).start()
+        return None
+
+    def _load_cross_encoder(self):
+        try:
+            from sentence_transformers import CrossEncoder
+            print(f"🎯 Loading reranker {self.rerank_model}...")
+            self._cross_encoder = CrossEncoder(self.rerank_model)
+        except Exception as e:
+            print(f"❌ Could not load reranker {self.rerank_model}, reranking is off: {e}")
+            self.rerank_model = None
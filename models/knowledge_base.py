@@ -0,0 +1,537 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows
+    resource = None
+
+import numpy as np
+from langchain_community.vectorstores import FAISS
+
+from models.document_parser import plan_parse_tasks, parse_task
+from models.rag_index import (
+    compute_settings_key, file_sha256, embed_in_batches, save_index, load_index, load_index_meta,
+    index_type_of, build_index, apply_search_params, index_vectors, delete_from_index, evaluate_index
+)
+
+
+SUPPORTED_EXTENSIONS = (".pdf", ".txt", ".md")
+
+# Parse failures that are not the file's fault. Files that hit one keep their
+# old manifest entry, so the next sync tries them again.
+RETRYABLE_ERRORS = (BrokenProcessPool, MemoryError, pickle.PicklingError, OSError)
+
+
+def peak_rss_mb():
+    """
+    Peak resident memory of this process and of its finished child processes
+    These are peaks over the whole lifetime of the process, not of one sync.
+    Returns a tuple of MB values, or (None, None) where it can't be measured.
+    """
+    if resource is None:
+        return None, None
+    # ru_maxrss is in KB on Linux
+    return (
+        round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024, 1),
+    )
+
+
+class KnowledgeBase:
+    """
+    FAISS index over a set of PDF and text files, updated incrementally
+
+    `sources` is a list of directories (searched recursively) and single
+    files. The index remembers the hash, mtime and chunk IDs of every file it
+    holds, so sync() only parses and embeds files that were added or changed,
+    and only deletes the chunks of files that changed or disappeared. The index
+    and its file manifest are persisted under index_root/<settings key>.
+
+    Changed files are parsed and chunked in a process pool and streamed into
+    the embedding stage batch by batch, so only a bounded amount of parsed
+    text is in memory at a time. Each file is applied on its own: once its
+    last chunk is embedded, its old chunks, new chunks and manifest entry are
+    swapped together, so a sync that fails part way leaves every file either
+    fully updated or untouched. Searches and index updates are serialized
+    with `lock`. Parsing and embedding happen outside it, so queries are only
+    blocked while a file is swapped in.
+
+    index_type is one of rag_index.INDEX_TYPES. New chunks are added straight
+    to the index of the configured type, using the IVF centroids it already
+    has. The very first chunks build a flat index, which is converted after
+    that sync. Changing the type converts the persisted index without
+    re-embedding, and IVF centroids are retrained once the index has grown 4x
+    since training.
+    """
+
+    def __init__(self, sources, index_root, embeddings, chunk_size, chunk_overlap, separator,
+                 model_name, batch_size=64, parse_workers=None, index_type="flat", index_params=None):
+        self.sources = sources
+        self.embeddings = embeddings
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.separator = separator
+        self.batch_size = batch_size
+        # Processes used to parse files, 1 = parse on the calling thread
+        self.parse_workers = parse_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.index_type = index_type
+        self.index_params = index_params or {}
+        self.index_trained_on = 0    # Vectors the IVF centroids were trained on
+
+        self.settings_key = compute_settings_key(chunk_size, chunk_overlap, separator, model_name)
+        self.index_dir = os.path.join(index_root, self.settings_key)
+
+        self.vectorstore = None
+        self.files = {}              # path -> {"hash", "mtime", "size", "ids"}
+        self.last_sync_stats = None
+        self.lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._watch_thread = None
+        self._stop_watching = threading.Event()
+
+    @property
+    def content_key(self):
+        """Changes whenever the indexed files or the index settings change"""
+        with self.lock:
+            files = sorted((path, entry["hash"]) for path, entry in self.files.items())
+        return hashlib.sha256(json.dumps([self.settings_key, files]).encode()).hexdigest()[:32]
+
+    @property
+    def is_empty(self):
+        with self.lock:
+            return self.vectorstore is None or not self.vectorstore.index_to_docstore_id
+
+    def load(self):
+        """Load the persisted index and manifest. Returns True if there was one."""
+        vectorstore = load_index(self.index_dir, self.embeddings)
+        meta = load_index_meta(self.index_dir)
+        if vectorstore is None or meta.get("settings_key") != self.settings_key:
+            return False
+
+        with self.lock:
+            self.vectorstore = vectorstore
+            self.files = meta.get("files", {})
+            self.index_trained_on = meta.get("index_trained_on", 0)
+            apply_search_params(vectorstore.index, self.index_params)
+        print(f"✅ Loaded {meta.get('index_type', 'flat')} knowledge base index with "
+              f"{len(self.files)} files from {self.index_dir}")
+
+        # The index type setting may have changed since the index was saved,
+        # and an interrupted sync may have left the manifest out of step
+        reconciled = self._reconcile_manifest()
+        if self._ensure_index_type() or reconciled:
+            self._save()
+        return True
+
+    def scan(self):
+        """Return {path: (mtime, size)} for every supported file in the sources"""
+        found = {}
+        for source in self.sources:
+            if os.path.isfile(source):
+                paths = [source]
+            elif os.path.isdir(source):
+                paths = [
+                    os.path.join(root, name)
+                    for root, _, names in os.walk(source)
+                    for name in names
+                ]
+            else:
+                continue
+
+            for path in paths:
+                if path.lower().endswith(SUPPORTED_EXTENSIONS):
+                    path = os.path.abspath(path)
+                    stat = os.stat(path)
+                    found[path] = (stat.st_mtime, stat.st_size)
+        return found
+
+    def sync(self):
+        """
+        Bring the index up to date with the files on disk
+        Returns a dict with the number of added, updated and removed files.
+        """
+        with self._sync_lock:
+            start_time = time.time()
+            peak_before, _ = peak_rss_mb()
+            current = self.scan()
+
+            # 1. Work out what changed - files with the same mtime and size are
+            # trusted, others are hashed to skip files that were only touched
+            removed = [path for path in self.files if path not in current]
+            changed = []
+            touched = {}
+            for path, (mtime, size) in current.items():
+                known = self.files.get(path)
+                if known and known["mtime"] == mtime and known["size"] == size:
+                    continue
+                digest = file_sha256(path)
+                if known and known["hash"] == digest:
+                    touched[path] = dict(known, mtime=mtime, size=size)
+                else:
+                    changed.append((path, digest, mtime, size))
+
+            stats = {"added": 0, "updated": 0, "removed": len(removed), "chunks_added": 0,
+                     "chunks_removed": 0, "embedding": None}
+            if not (removed or changed or touched):
+                stats["seconds"] = round(time.time() - start_time, 3)
+                stats["changed"] = False
+                self.last_sync_stats = stats
+                return stats
+
+            # 2. Forget removed files and note files that were only touched
+            with self.lock:
+                for path in removed:
+                    self._replace_file_chunks(path, None, [], stats)
+                self.files.update(touched)
+
+            # 3. Parse -> chunk -> embed, one batch at a time. A file's vectors
+            # are held until its last chunk is embedded, then its chunks and
+            # manifest entry are swapped in together (_finish_file). Only the
+            # files still being parsed or embedded are in memory.
+            pending = {
+                path: {"entry": {"hash": digest, "mtime": mtime, "size": size, "ids": []},
+                       "tasks": None, "chunks": 0, "staged": [], "rejected": False, "retry": False}
+                for path, digest, mtime, size in changed
+            }
+            stats.update(failed=0, retrying=0)
+
+            def add_batch(texts, vectors, metadatas, ids):
+                for text, vector, metadata, doc_id in zip(texts, vectors, metadatas, ids):
+                    pending[metadata["source"]]["staged"].append((text, vector, metadata, doc_id))
+                self._finish_files(pending, stats)
+
+            try:
+                chunks = self._iter_changed_chunks(pending, stats)
+                stats["embedding"] = embed_in_batches(self.embeddings, chunks, self.batch_size, add_batch)
+                self._finish_files(pending, stats)
+            except Exception:
+                # Files that were finished stay indexed, the rest keep their old version
+                print(f"❌ Knowledge base sync failed, {len(pending)} files were not updated")
+                self._save()
+                raise
+
+            # 4. Convert new documents to the configured index type and persist
+            # the index and manifest
+            self._ensure_index_type()
+            self._save()
+
+            stats["seconds"] = round(time.time() - start_time, 3)
+            # ru_maxrss never goes down, so a sync only shows up as growth of the peak
+            stats["lifetime_peak_rss_mb"], stats["lifetime_peak_worker_rss_mb"] = peak_rss_mb()
+            if peak_before is not None:
+                stats["peak_rss_growth_mb"] = round(stats["lifetime_peak_rss_mb"] - peak_before, 1)
+            stats["changed"] = bool(removed or changed)
+            self.last_sync_stats = stats
+            print(f"📚 Knowledge base synced in {stats['seconds']:.2f} seconds: {stats['added']} added, "
+                  f"{stats['updated']} updated, {stats['removed']} removed, {stats['failed']} failed "
+                  f"(+{stats['chunks_added']}/-{stats['chunks_removed']} chunks)")
+            if stats["retrying"]:
+                print(f"🔁 {stats['retrying']} files could not be parsed and will be retried on the next sync")
+            if peak_before is not None:
+                print(f"📈 Lifetime peak RSS: {stats['lifetime_peak_rss_mb']} MB "
+                      f"(+{stats['peak_rss_growth_mb']} MB during this sync), "
+                      f"parse workers: {stats['lifetime_peak_worker_rss_mb']} MB")
+            return stats
+
+    def _finish_files(self, pending, stats):
+        """Swap in every pending file whose tasks are done and whose chunks are all embedded"""
+        for path, state in list(pending.items()):
+            if state["tasks"] == 0 and len(state["staged"]) == state["chunks"]:
+                del pending[path]
+                self._finish_file(path, state, stats)
+
+    def _finish_file(self, path, state, stats):
+        """
+        Replace the chunks and manifest entry of one changed file
+        Files the parser rejected are recorded with their new hash, so they are
+        only retried once they change again. Files that failed because of the
+        pool or the worker (see RETRYABLE_ERRORS) keep their old entry, so the
+        next sync tries them again.
+        """
+        if state["retry"]:
+            stats["failed"] += 1
+            stats["retrying"] += 1
+            return
+
+        entry = state["entry"]
+        with self.lock:
+            if state["rejected"] and not entry["ids"]:
+                # Nothing could be parsed - keep serving the old version
+                entry["ids"] = self.files.get(path, {}).get("ids", [])
+                self.files[path] = entry
+            else:
+                if not state["rejected"]:
+                    stats["updated" if path in self.files else "added"] += 1
+                self._replace_file_chunks(path, entry, state["staged"], stats)
+        if state["rejected"]:
+            stats["failed"] += 1
+
+    def _replace_file_chunks(self, path, entry, staged, stats):
+        """
+        Swap the chunks of one file in the index and its manifest entry
+        entry=None removes the file. Called with `lock` held.
+        """
+        try:
+            stale_ids = self.files.get(path, {}).get("ids", [])
+            if stale_ids and self.vectorstore is not None:
+                present = set(self.vectorstore.index_to_docstore_id.values())
+                stale_ids = [doc_id for doc_id in stale_ids if doc_id in present]
+                if stale_ids:
+                    delete_from_index(self.vectorstore, stale_ids, self.index_params)
+                stats["chunks_removed"] += len(stale_ids)
+
+            if staged:
+                texts, vectors, metadatas, ids = (list(column) for column in zip(*staged))
+                pairs = list(zip(texts, np.asarray(vectors, dtype=np.float32)))
+                if self.vectorstore is None:
+                    self.vectorstore = FAISS.from_embeddings(pairs, self.embeddings, metadatas=metadatas, ids=ids)
+                else:
+                    self.vectorstore.add_embeddings(pairs, metadatas=metadatas, ids=ids)
+                stats["chunks_added"] += len(ids)
+
+            if entry is None:
+                self.files.pop(path, None)
+            else:
+                self.files[path] = entry
+        except Exception:
+            # Make the manifest describe what actually made it into the index
+            self._reconcile_manifest()
+            raise
+
+    def _reconcile_manifest(self):
+        """
+        Make the manifest and the index agree again, e.g. after a failed commit
+        Files that lost chunks are forgotten by hash, so the next sync parses
+        them again, and chunks no file claims are deleted. Returns True if
+        anything had to be fixed.
+        """
+        with self.lock:
+            present = set(self.vectorstore.index_to_docstore_id.values()) if self.vectorstore else set()
+            claimed = set()
+            fixed = False
+            for path, entry in self.files.items():
+                kept = [doc_id for doc_id in entry["ids"] if doc_id in present]
+                if len(kept) != len(entry["ids"]):
+                    print(f"⚠️ {len(entry['ids']) - len(kept)} chunks of {os.path.basename(path)} "
+                          f"are missing from the index, it will be indexed again")
+                    self.files[path] = dict(entry, ids=kept, hash=None, mtime=None)
+                    fixed = True
+                claimed.update(kept)
+
+            orphans = list(present - claimed)
+            if orphans:
+                print(f"⚠️ Deleting {len(orphans)} chunks that no file in the manifest owns")
+                delete_from_index(self.vectorstore, orphans, self.index_params)
+                fixed = True
+            return fixed
+
+    def _ensure_index_type(self):
+        """Convert the index to the configured type if needed. Returns True if it was converted."""
+        with self.lock:
+            if self.vectorstore is None or self.vectorstore.index.ntotal == 0:
+                return False
+            index = self.vectorstore.index
+            current_type = index_type_of(index)
+            count = index.ntotal
+            retrain = current_type == "ivf" and count > 4 * max(self.index_trained_on, 1)
+            if current_type == self.index_type and not retrain:
+                return False
+
+            start_time = time.time()
+            new_index = build_index(self.index_type, index_vectors(index), self.index_params)
+            self.vectorstore.index = new_index
+            self.index_trained_on = count if self.index_type == "ivf" else 0
+        print(f"🔁 {'Retrained' if retrain and current_type == self.index_type else 'Converted'} "
+              f"{current_type} index to {self.index_type} ({count} vectors) in {time.time() - start_time:.2f} seconds")
+        return True
+
+    def _save(self):
+        if self.vectorstore is None:
+            return
+        with self.lock:
+            save_index(self.vectorstore, self.index_dir, meta={
+                "settings_key": self.settings_key,
+                "index_type": index_type_of(self.vectorstore.index),
+                "index_params": self.index_params,
+                "index_trained_on": self.index_trained_on,
+                "files": self.files,
+            })
+
+    def evaluate_index(self, k=5, queries=200):
+        """Recall@k and latency of the index against exact search, see rag_index.evaluate_index"""
+        with self.lock:
+            if self.vectorstore is None:
+                return None
+            report = evaluate_index(self.vectorstore.index, k=k, queries=queries)
+        print(f"📏 {report['index_type']} index, {report['vectors']} vectors: recall@{report['k']} "
+              f"{report['recall_at_k']:.3f}, p50 {report['latency_ms_p50']:.3f} ms / p95 "
+              f"{report['latency_ms_p95']:.3f} ms (exact: p50 {report['exact_latency_ms_p50']:.3f} ms)")
+        return report
+
+    def _iter_changed_chunks(self, pending, stats):
+        """
+        Yield (text, metadata, doc_id) for every chunk of the pending files
+        Keeps each file's task and chunk counts and chunk IDs in `pending`,
+        and marks files that could not be (fully) parsed as rejected, or as
+        retry when the failure was not the file's fault.
+        """
+        tasks = []
+        for path, state in pending.items():
+            try:
+                file_tasks = plan_parse_tasks(path)
+            except Exception as e:
+                print(f"⚠️ Skipping {path}: {e}")
+                file_tasks = []
+                state["retry" if isinstance(e, RETRYABLE_ERRORS) else "rejected"] = True
+            state["tasks"] = len(file_tasks)
+            tasks += file_tasks
+        # Files without tasks (failed or empty) are done already
+        self._finish_files(pending, stats)
+
+        for (path, first_page, _), result in self._run_parse_tasks(tasks):
+            state = pending[path]
+            state["tasks"] -= 1
+            if isinstance(result, Exception):
+                print(f"⚠️ Could not parse {os.path.basename(path)}: {result}")
+                state["retry" if isinstance(result, RETRYABLE_ERRORS) else "rejected"] = True
+                result = []
+
+            path_key = hashlib.sha256(path.encode()).hexdigest()[:12]
+            prefix = f"{path_key}:{state['entry']['hash'][:12]}:{first_page or 0}"
+            state["chunks"] += len(result)
+            for i, (text, metadata) in enumerate(result):
+                doc_id = f"{prefix}:{i}"
+                state["entry"]["ids"].append(doc_id)
+                yield text, dict(metadata, source=path), doc_id
+            if not result:
+                # No chunks left to embed, so the file may be finished now
+                self._finish_files(pending, stats)
+
+    def _run_parse_tasks(self, tasks):
+        """
+        Yield (task, chunks or exception) as parse tasks finish
+        Only a few tasks are in flight per worker, so parsed text doesn't pile
+        up faster than it can be embedded.
+        """
+        settings = (self.chunk_size, self.chunk_overlap, self.separator)
+        if self.parse_workers <= 1 or len(tasks) <= 1:
+            # A process pool isn't worth starting for a single task
+            for task in tasks:
+                try:
+                    yield task, parse_task(*task, *settings)
+                except Exception as e:
+                    yield task, e
+            return
+
+        # spawn, because forking a process that runs Qt and other threads is unsafe
+        with ProcessPoolExecutor(
+            max_workers=min(self.parse_workers, len(tasks)),
+            mp_context=multiprocessing.get_context("spawn")
+        ) as executor:
+            pending_tasks = iter(tasks)
+            in_flight = {}
+            broken = None   # Set once a worker died and the pool takes no more work
+
+            def submit_next():
+                nonlocal broken
+                task = next(pending_tasks, None)
+                if task is None:
+                    return
+                try:
+                    in_flight[executor.submit(parse_task, *task, *settings)] = task
+                except BrokenProcessPool as e:
+                    broken = e
+                    failed_tasks.append(task)
+
+            failed_tasks = []
+            for _ in range(self.parse_workers * 2):
+                submit_next()
+
+            while in_flight:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    task = in_flight.pop(future)
+                    submit_next()
+                    try:
+                        yield task, future.result()
+                    except Exception as e:
+                        yield task, e
+
+            # Tasks that could not be submitted to a broken pool count as
+            # failures of their files
+            if broken is not None:
+                failed_tasks += list(pending_tasks)
+                print(f"⚠️ A parse worker died, {len(failed_tasks)} tasks were not parsed")
+            for task in failed_tasks:
+                yield task, broken
+
+    def vector_search(self, vector, k=4):
+        """Return the k nearest chunks as (doc_id, Document) tuples, best first"""
+        with self.lock:
+            if self.vectorstore is None:
+                return []
+            query = np.asarray([vector], dtype=np.float32)
+            _, positions = self.vectorstore.index.search(query, k)
+            ids = [self.vectorstore.index_to_docstore_id[p] for p in positions[0] if p != -1]
+            return [(doc_id, self.vectorstore.docstore.search(doc_id)) for doc_id in ids]
+
+    def document_ids(self):
+        """IDs of every chunk in the index"""
+        with self.lock:
+            return set(self.vectorstore.index_to_docstore_id.values()) if self.vectorstore else set()
+
+    def get_documents(self, ids):
+        """Look chunks up by ID. Returns {doc_id: Document} for the IDs still in the index."""
+        with self.lock:
+            if self.vectorstore is None:
+                return {}
+            found = {}
+            for doc_id in ids:
+                doc = self.vectorstore.docstore.search(doc_id)
+                if not isinstance(doc, str):
+                    # The docstore returns an error string for unknown IDs
+                    found[doc_id] = doc
+            return found
+
+    def similarity_search(self, query, k=4):
+        with self.lock:
+            return self.vectorstore.similarity_search(query, k=k) if self.vectorstore else []
+
+    def similarity_search_by_vector(self, vector, k=4):
+        with self.lock:
+            return self.vectorstore.similarity_search_by_vector(vector, k=k) if self.vectorstore else []
+
+    def start_watching(self, interval=10.0, on_change=None):
+        """
+        Poll the sources every `interval` seconds and sync changes
+        on_change(stats) is called on the watcher thread after each sync that
+        changed the index.
+        """
+        if self._watch_thread is not None and self._watch_thread.is_alive():
+            return
+        self._stop_watching.clear()
+
+        def watch():
+            while not self._stop_watching.wait(interval):
+                try:
+                    stats = self.sync()
+                except Exception as e:
+                    print(f"❌ Error syncing knowledge base: {e}")
+                    continue
+                if stats["changed"] and on_change:
+                    on_change(stats)
+
+        self._watch_thread = threading.Thread(target=watch, name="knowledge-base-watch", daemon=True)
+        self._watch_thread.start()
+
+    def stop_watching(self):
+        self._stop_watching.set()
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import re
+import statistics
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+
+
+class LLMBackend(ABC):
+    """
+    Base class for the LLM that answers advisor questions
+
+    Results use the format of Ollama's /api/chat: chat() returns one dict with
+    the message and the token counts and timings (durations in nanoseconds),
+    stream_chat() yields chunks whose last one has "done" set and carries the
+    counts and timings. Also keeps first-token latencies of cold and warm
+    requests, for comparison.
+    """
+
+    name = "llm"
+
+    def __init__(self, cold_load_threshold_ms=100.0):
+        # A request counts as cold if the model had to be loaded for it
+        self.cold_load_threshold_ms = cold_load_threshold_ms
+        self._stats_lock = threading.Lock()
+        self._first_token_ms = {"cold": deque(maxlen=50), "warm": deque(maxlen=50)}
+
+    @abstractmethod
+    def chat(self, messages, options=None):
+        """Answer in one piece. Returns a dict shaped like Ollama's final chat response."""
+
+    @abstractmethod
+    def stream_chat(self, messages, options=None, cancel_token=None):
+        """Yield answer chunks shaped like Ollama's streamed chat responses"""
+
+    def warm_up(self):
+        """Load the model in the background. Returns True if a warm-up started."""
+        return False
+
+    def close(self):
+        pass
+
+    def record_first_token(self, first_token_ms, load_ms):
+        """
+        Remember how long a request took to its first token
+        Returns "cold" if the model had to be loaded for it, otherwise "warm".
+        """
+        kind = "cold" if load_ms and load_ms >= self.cold_load_threshold_ms else "warm"
+        with self._stats_lock:
+            self._first_token_ms[kind].append(first_token_ms)
+        return kind
+
+    def latency_report(self):
+        """Return the count and median first-token latency of cold and warm requests"""
+        with self._stats_lock:
+            report = {
+                kind: {
+                    "requests": len(values),
+                    "median_first_token_ms": round(statistics.median(values), 1) if values else None,
+                }
+                for kind, values in self._first_token_ms.items()
+            }
+        cold = report["cold"]["median_first_token_ms"]
+        warm = report["warm"]["median_first_token_ms"]
+        report["saved_ms"] = round(cold - warm, 1) if cold is not None and warm is not None else None
+        return report
+
+
+class OllamaBackend(LLMBackend):
+    """Answers with a model served by Ollama, through an OllamaClient"""
+
+    def __init__(self, client, model="gemma:2b", keep_alive="30m", timeout=45, stream_timeout=(5, 45)):
+        super().__init__()
+        self.client = client
+        self.model = model
+        # How long Ollama keeps the model loaded after a request ("30m", "1h",
+        # seconds, or -1 for forever), so later questions skip the model load
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        # When streaming, the read timeout applies to the gap between chunks
+        self.stream_timeout = stream_timeout
+
+    @property
+    def name(self):
+        return f"ollama/{self.model}"
+
+    def chat(self, messages, options=None):
+        response = self.client.chat(self._payload(messages, options, stream=False), timeout=self.timeout)
+        if response.status_code != 200:
+            raise Exception(f"Failed to get response from Ollama API: {response.status_code} - {response.text}")
+        return response.json()
+
+    def stream_chat(self, messages, options=None, cancel_token=None):
+        payload = self._payload(messages, options, stream=True)
+        with self.client.chat(payload, stream=True, timeout=self.stream_timeout) as response:
+            if cancel_token:
+                cancel_token.attach(response)
+            if response.status_code != 200:
+                raise Exception(f"Failed to get response from Ollama API: {response.status_code} - {response.text}")
+
+            # Ollama streams one JSON object per line. chunk_size=None hands
+            # over data as soon as it arrives instead of waiting for 512 bytes.
+            for line in response.iter_lines(chunk_size=None):
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                yield chunk
+                if chunk.get("done"):
+                    break
+
+    def warm_up(self):
+        return self.client.warm_up(self.model, self.keep_alive)
+
+    def close(self):
+        self.client.close()
+
+    def _payload(self, messages, options, stream):
+        return {
+            "model": self.model,
+            "messages": messages,
+            "stream": stream,
+            "keep_alive": self.keep_alive,
+            "options": options or {},
+        }
+
+
+class FakeBackend(LLMBackend):
+    """
+    Local stand-in for an LLM that replays canned answers
+
+    Needs no Ollama or network, so the advisor pipeline (retrieval, prompt
+    assembly, streaming into the view) can be benchmarked anywhere. The answer
+    is picked by a hash of the question, so the same question always gets the
+    same answer. Tokens are emitted at tokens_per_second after a simulated
+    prefill. Loading the model takes load_ms, paid by warm_up() on a
+    background thread or by the first request, like a cold start in Ollama.
+    """
+
+    name = "fake"
+
+    DEFAULT_ANSWERS = [
+        "A defensive investor should keep a balanced mix of high-grade bonds and leading "
+        "common stocks, rebalancing when the split drifts far from the target. Favour large, "
+        "conservatively financed companies with a long record of dividends, and avoid paying "
+        "more than a moderate multiple of average earnings.",
+        "Chasing popular growth stocks and new issues is risky because their prices already "
+        "assume years of rapid growth. When that growth disappoints, the price falls sharply, "
+        "and investors who bought at the peak can wait years to recover their capital.",
+        "A bear market lets a patient investor buy sound companies at prices below their "
+        "intrinsic value. Keeping some cash or bonds in reserve, and sticking to a plan, turns "
+        "market declines into opportunities rather than reasons to sell.",
+    ]
+
+    def __init__(self, answers=None, tokens_per_second=20.0, prefill_ms=100.0, load_ms=0.0):
+        super().__init__()
+        self.answers = list(answers or self.DEFAULT_ANSWERS)
+        self.tokens_per_second = tokens_per_second
+        self.prefill_ms = prefill_ms
+        self.load_ms = load_ms
+        self._loaded_at = None   # time.monotonic() when the model is loaded, once loading started
+        self._lock = threading.Lock()
+
+    def chat(self, messages, options=None):
+        tokens = []
+        for chunk in self.stream_chat(messages, options):
+            tokens.append(chunk["message"]["content"])
+        return dict(chunk, message={"role": "assistant", "content": "".join(tokens)})
+
+    def stream_chat(self, messages, options=None, cancel_token=None):
+        # Wait for the rest of the load if a warm-up (or another request) started it
+        load_ms = max(0.0, (self._start_loading() - time.monotonic()) * 1000)
+        prompt = "".join(message["content"] for message in messages)
+        tokens = re.findall(r"\s*\S+", self._pick_answer(messages))
+
+        if self._sleep((load_ms + self.prefill_ms) / 1000, cancel_token):
+            return
+        generation_start = time.perf_counter()
+        for token in tokens:
+            yield {"message": {"role": "assistant", "content": token}, "done": False}
+            if self._sleep(1 / self.tokens_per_second, cancel_token):
+                return
+        generation_ns = int((time.perf_counter() - generation_start) * 1e9)
+
+        yield {
+            "message": {"role": "assistant", "content": ""},
+            "done": True,
+            "prompt_eval_count": max(1, len(prompt) // 4),
+            "prompt_eval_duration": int(self.prefill_ms * 1e6),
+            "eval_count": len(tokens),
+            "eval_duration": generation_ns,
+            "load_duration": int(load_ms * 1e6),
+            "total_duration": int((load_ms + self.prefill_ms) * 1e6) + generation_ns,
+        }
+
+    def warm_up(self):
+        with self._lock:
+            if self._loaded_at is not None:
+                return False
+            self._loaded_at = time.monotonic() + self.load_ms / 1000
+        threading.Thread(target=self._warm_up_worker, name="fake-llm-warm-up", daemon=True).start()
+        return True
+
+    def _warm_up_worker(self):
+        """Background thread body for warm_up"""
+        start_time = time.time()
+        print(f"🔥 Warming up {self.name}...")
+        self._sleep(max(0.0, self._loaded_at - time.monotonic()), None)
+        print(f"🔥 {self.name} loaded in {time.time() - start_time:.2f} seconds")
+
+    def _start_loading(self):
+        """Start loading the model if nobody has yet. Returns when it will be loaded."""
+        with self._lock:
+            if self._loaded_at is None:
+                self._loaded_at = time.monotonic() + self.load_ms / 1000
+            return self._loaded_at
+
+    def _pick_answer(self, messages):
+        question = messages[-1]["content"] if messages else ""
+        index = int(hashlib.sha256(question.encode()).hexdigest(), 16) % len(self.answers)
+        return self.answers[index]
+
+    @staticmethod
+    def _sleep(seconds, cancel_token):
+        """Sleep, waking up early if cancelled. Returns True if cancelled."""
+        if cancel_token is None:
+            time.sleep(seconds)
+            return False
+        return cancel_token.wait(seconds)
@@ -0,0 +1,339 @@
+# Local stand-in for the backend API at http://localhost:5124/api, serving
+# synthetic market data (models/synthetic_market.py) and in-memory users and
+# transactions, for offline development, load tests and benchmarks.
+#
+#   python -m models.mock_backend_server --port 5124 --latency-ms 30 --error-rate 0.02
+#
+# Tests and benchmarks can also run it in-process:
+#
+#   server = MockBackendServer(latency_ms=20)
+#   server.start(port=5124)
+#   ...
+#   server.stop()
+
+import argparse
+import asyncio
+import itertools
+import random
+import threading
+from datetime import datetime, timedelta
+
+from aiohttp import web
+
+from models.synthetic_market import SyntheticMarket
+
+
+class MockBackendServer:
+    """
+    aiohttp application implementing the backend endpoints the app calls
+
+    Every request is delayed by latency_ms plus up to jitter_ms, and fails
+    with error_status at error_rate, so clients can be tested against a slow
+    or flaky backend. Both can be changed while the server runs with
+    configure(). The users match the local fallback users of MockStockModel.
+    """
+
+    def __init__(self, market=None, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, error_status=503, seed=None):
+        self.market = market or SyntheticMarket()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self._random = random.Random(seed)
+
+        self.users = {}          # username -> user dict
+        self.transactions = []   # transaction dicts, oldest first
+        self._user_ids = itertools.count(1)
+        self._transaction_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.request_count = 0
+        self.error_count = 0
+
+        for username, password in (("1", "1"), ("maoz", "3242"), ("noam", "123")):
+            self._add_user(username, password, f"{username}@example.com")
+        self._seed_transactions(user_id=1)
+
+        self._loop = None
+        self._runner = None
+        self._thread = None
+
+    def configure(self, latency_ms=None, jitter_ms=None, error_rate=None, error_status=None):
+        """Change latency and error injection, also while the server is running"""
+        if latency_ms is not None:
+            self.latency_ms = latency_ms
+        if jitter_ms is not None:
+            self.jitter_ms = jitter_ms
+        if error_rate is not None:
+            self.error_rate = error_rate
+        if error_status is not None:
+            self.error_status = error_status
+
+    def create_app(self):
+        app = web.Application(middlewares=[self._inject_faults])
+        app.add_routes([
+            web.post("/api/auth/queries/login", self.login),
+            web.post("/api/auth/commands/register", self.register),
+            web.get("/api/auth/queries/user/{user_id}", self.get_user),
+            web.post("/api/transaction/commands/add", self.add_transaction),
+            web.get("/api/transaction/queries/user/{user_id}", self.get_user_transactions),
+            web.get("/api/transaction/queries/portfolio/{user_id}", self.get_portfolio),
+            web.get("/api/stock/queries/price/{symbol}", self.get_price),
+            web.get("/api/stock/queries/prices", self.get_prices),
+            web.get("/api/stock/queries/yahoo-history/{symbol}", self.get_history),
+            web.get("/api/stock/queries/profile/{symbol}", self.get_profile),
+            web.get("/api/stock/queries/description/{symbol}", self.get_description),
+            web.get("/api/stock/queries/search", self.search),
+        ])
+        return app
+
+    def start(self, host="127.0.0.1", port=5124):
+        """Run the server on a background thread. Returns once it accepts connections."""
+        started = threading.Event()
+        errors = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            self._runner = web.AppRunner(self.create_app())
+            try:
+                loop.run_until_complete(self._runner.setup())
+                loop.run_until_complete(web.TCPSite(self._runner, host, port).start())
+            except Exception as e:
+                # e.g. the port is taken
+                errors.append(e)
+                loop.run_until_complete(self._runner.cleanup())
+                loop.close()
+                started.set()
+                return
+            self._loop = loop
+            started.set()
+            loop.run_forever()
+            loop.run_until_complete(self._runner.cleanup())
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name="mock-backend", daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        print(f"🧪 Mock backend listening on http://{host}:{port}/api")
+
+    def stop(self):
+        """Stop a server started with start()"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop = None
+
+    @web.middleware
+    async def _inject_faults(self, request, handler):
+        self.request_count += 1
+        delay_ms = self.latency_ms + self._random.uniform(0, self.jitter_ms)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+        if self.error_rate and self._random.random() < self.error_rate:
+            self.error_count += 1
+            return web.json_response({"error": "Injected failure"}, status=self.error_status)
+        return await handler(request)
+
+    # Auth
+
+    async def login(self, request):
+        body = await request.json()
+        user = self.users.get(body.get("username"))
+        if user is None or user["password"] != body.get("password"):
+            return web.json_response({"error": "Invalid username or password"}, status=401)
+        return web.json_response(dict(self._public_user(user), token=f"mock-token-{user['userId']}"))
+
+    async def register(self, request):
+        body = await request.json()
+        username, password = body.get("username"), body.get("password")
+        if not username or not password:
+            return web.json_response({"error": "Username and password are required"}, status=400)
+        with self._lock:
+            if username in self.users:
+                return web.json_response({"error": "Username already exists"}, status=409)
+            user = self._add_user(username, password, body.get("email", ""))
+        return web.json_response(self._public_user(user))
+
+    async def get_user(self, request):
+        user = self._find_user(request.match_info["user_id"])
+        if user is None:
+            return web.json_response({"error": "User not found"}, status=404)
+        return web.json_response(self._public_user(user))
+
+    # Transactions
+
+    async def add_transaction(self, request):
+        body = await request.json()
+        try:
+            user_id = int(body["UserId"])
+            symbol = str(body["Symbol"]).upper()
+            transaction_type = str(body["TransactionType"]).upper()
+            quantity = float(body["Quantity"])
+            price = float(body["Price"])
+        except (KeyError, TypeError, ValueError):
+            return web.json_response({"error": "Invalid transaction"}, status=400)
+        if transaction_type not in ("BUY", "SELL") or quantity <= 0 or price <= 0:
+            return web.json_response({"error": "Invalid transaction"}, status=400)
+
+        with self._lock:
+            if transaction_type == "SELL":
+                held = self._positions(user_id).get(symbol, {}).get("quantity", 0)
+                if quantity > held:
+                    return web.json_response({"error": f"Only {held:g} shares of {symbol} held"}, status=400)
+            transaction = self._add_transaction(user_id, symbol, transaction_type, quantity, price, datetime.now())
+        return web.json_response(transaction, status=201)
+
+    async def get_user_transactions(self, request):
+        user_id = _int_or_none(request.match_info["user_id"])
+        with self._lock:
+            transactions = [t for t in self.transactions if t["userId"] == user_id]
+        return web.json_response(transactions)
+
+    async def get_portfolio(self, request):
+        user_id = _int_or_none(request.match_info["user_id"])
+        with self._lock:
+            positions = self._positions(user_id)
+        return web.json_response([
+            {"symbol": symbol, "quantity": position["quantity"],
+             "averageBuyPrice": round(position["cost"] / position["quantity"], 2)}
+            for symbol, position in positions.items()
+            if position["quantity"] > 0
+        ])
+
+    # Stocks
+
+    async def get_price(self, request):
+        symbol = request.match_info["symbol"].upper()
+        if not self.market.is_valid_symbol(symbol):
+            return web.json_response({"error": f"Unknown symbol {symbol}"}, status=404)
+        return web.json_response({"symbol": symbol, "currentPrice": self.market.current_price(symbol)})
+
+    async def get_prices(self, request):
+        symbols = [s.strip().upper() for s in request.query.get("symbols", "").split(",") if s.strip()]
+        return web.json_response([
+            {"symbol": symbol, "currentPrice": self.market.current_price(symbol)}
+            for symbol in dict.fromkeys(symbols)
+            if self.market.is_valid_symbol(symbol)
+        ])
+
+    async def get_history(self, request):
+        symbol = request.match_info["symbol"].upper()
+        if not self.market.is_valid_symbol(symbol):
+            return web.json_response({"error": f"Unknown symbol {symbol}"}, status=404)
+        try:
+            end_day = request.query.get("to") or datetime.now().strftime("%Y-%m-%d")
+            start_day = request.query.get("from") or (datetime.now() - timedelta(days=365)).strftime("%Y-%m-%d")
+            bars = self.market.history(symbol, start_day, end_day)
+        except ValueError:
+            return web.json_response({"error": "Dates must be YYYY-MM-DD"}, status=400)
+        return web.json_response(bars)
+
+    async def get_profile(self, request):
+        profile = self.market.profile(request.match_info["symbol"].upper())
+        if profile is None:
+            return web.json_response({"error": "Profile not found"}, status=404)
+        return web.json_response(profile)
+
+    async def get_description(self, request):
+        description = self.market.description(request.match_info["symbol"].upper())
+        if description is None:
+            return web.json_response({"error": "Description not found"}, status=404)
+        # A JSON string, like the real API
+        return web.json_response(description)
+
+    async def search(self, request):
+        symbol = self.market.search(request.query.get("name", ""))
+        if symbol is None:
+            return web.json_response({"error": "Company not found"}, status=404)
+        return web.json_response({"symbol": symbol, "name": self.market.profile(symbol)["name"]})
+
+    # In-memory data
+
+    def _add_user(self, username, password, email):
+        user_id = next(self._user_ids)
+        user = {
+            "userId": user_id,
+            "username": username,
+            "password": password,
+            "email": email,
+            "profilePictureUrl": "",
+        }
+        self.users[username] = user
+        return user
+
+    def _find_user(self, user_id):
+        user_id = _int_or_none(user_id)
+        return next((user for user in self.users.values() if user["userId"] == user_id), None)
+
+    @staticmethod
+    def _public_user(user):
+        return {key: value for key, value in user.items() if key != "password"}
+
+    def _add_transaction(self, user_id, symbol, transaction_type, quantity, price, when):
+        transaction = {
+            "transactionId": next(self._transaction_ids),
+            "userId": user_id,
+            "symbol": symbol,
+            "transactionType": transaction_type,
+            "quantity": quantity,
+            "price": price,
+            "transactionDate": when.isoformat(timespec="seconds"),
+        }
+        self.transactions.append(transaction)
+        return transaction
+
+    def _seed_transactions(self, user_id):
+        """Buy a few positions at their synthetic closes over the last weeks"""
+        today = datetime.now().replace(hour=10, minute=0, second=0, microsecond=0)
+        for days_ago, symbol, quantity in ((30, "AAPL", 35), (21, "MSFT", 10), (14, "GOOGL", 5), (7, "NVDA", 4)):
+            when = today - timedelta(days=days_ago)
+            self._add_transaction(user_id, symbol, "BUY", float(quantity), self.market.close(symbol, when.date()), when)
+
+    def _positions(self, user_id):
+        """Return {symbol: {"quantity", "cost"}} for a user, using average cost for sells"""
+        positions = {}
+        for t in self.transactions:
+            if t["userId"] != user_id:
+                continue
+            position = positions.setdefault(t["symbol"], {"quantity": 0.0, "cost": 0.0})
+            if t["transactionType"] == "BUY":
+                position["quantity"] += t["quantity"]
+                position["cost"] += t["quantity"] * t["price"]
+            elif position["quantity"] > 0:
+                average = position["cost"] / position["quantity"]
+                position["quantity"] -= t["quantity"]
+                position["cost"] = average * position["quantity"]
+        return positions
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the mock backend API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5124)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay added to every request")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Random extra delay, up to this much")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests that fail, 0-1")
+    parser.add_argument("--error-status", type=int, default=503, help="HTTP status of injected failures")
+    parser.add_argument("--seed", type=int, default=None, help="Seed for latency jitter and failures")
+    args = parser.parse_args()
+
+    server = MockBackendServer(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        error_status=args.error_status, seed=args.seed,
+    )
+    print(f"🧪 Mock backend on http://{args.host}:{args.port}/api "
+          f"(latency {args.latency_ms:g}+{args.jitter_ms:g} ms, error rate {args.error_rate:.0%})")
+    web.run_app(server.create_app(), host=args.host, port=args.port, print=None)
+
+
+if __name__ == "__main__":
+    main()
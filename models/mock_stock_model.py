@@ -1,21 +1,115 @@
 import random
 import requests
 import os
+import json
+import hashlib
 import time
-# RAG imports
-from langchain_community.document_loaders import PyPDFLoader
-from langchain.text_splitter import CharacterTextSplitter
-from langchain_community.vectorstores import Chroma
-from langchain_community.embeddings import HuggingFaceEmbeddings
-from langchain_community.vectorstores import FAISS
-from langchain.chains import RetrievalQA
-from langchain_community.llms import Ollama
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timedelta
+from models.quote_cache import QuoteCache, EstimatedPrice
+from models.history_store import HistoryStore
+from models.backend_client import BackendClient
+from models.answer_cache import AnswerCache
+from models.prompt_budget import PromptBudget, ollama_timings
+from models.ollama_client import OllamaClient
+from models.llm_backends import OllamaBackend
+from models.advisor_scheduler import AdvisorScheduler, AdvisorQueueFull
+from models.synthetic_market import SyntheticMarket
+# The RAG stack (langchain, FAISS, sentence-transformers/torch) is imported
+# inside the RAG methods, so importing this module stays cheap
+
+class AdviceCancelToken:
+    """
+    Cancels a stream_ai_advice call from another thread
+    The LLM backend attaches the open Ollama response, and cancel() shuts down
+    its socket so a read blocked waiting for the next token returns at once.
+    """
+
+    def __init__(self):
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._response = None
+
+    @property
+    def cancelled(self):
+        return self._cancelled.is_set()
+
+    def wait(self, timeout):
+        """Wait up to timeout seconds for a cancel. Returns True if cancelled."""
+        return self._cancelled.wait(timeout)
+
+    def cancel(self):
+        with self._lock:
+            self._cancelled.set()
+            response = self._response
+        if response is not None:
+            self._abort(response)
+
+    def attach(self, response):
+        """Remember the response to abort. Aborts it at once if already cancelled."""
+        with self._lock:
+            self._response = response
+            cancelled = self._cancelled.is_set()
+        if cancelled:
+            self._abort(response)
+
+    @staticmethod
+    def _abort(response):
+        raw = response.raw
+        if hasattr(raw, "shutdown"):
+            # urllib3 >= 2.3 - unblocks a read in progress on another thread
+            raw.shutdown()
+        else:
+            response.close()
+
 
 class MockStockModel:
+    # Answer given when the advisor queue is full
+    ADVISOR_BUSY_MESSAGE = "The advisor is busy answering other questions. Please try again in a moment."
+
     def __init__(self):
         # Base API URL
         self.api_base_url = "http://localhost:5124/api"
+        # The LLM answering advisor questions. Replace it with
+        # llm_backends.FakeBackend() to run the advisor without Ollama.
+        self.llm_backend = OllamaBackend(OllamaClient("http://localhost:11434"), model="gemma:2b", keep_alive="30m")
+        self.llm_options = {
+            "temperature": 0.2,    # Slightly higher to reduce repetition loops
+            "max_tokens": 150,     # More limited to prevent runaway repetition 
+            "top_p": 0.85,         # Slightly lower for more focused responses
+            "frequency_penalty": 1.0  # Add this to discourage repetition
+        }
+        # Questions from all advisor windows share the LLM: at most
+        # max_concurrent at a time, max_queue more waiting. Questions asked
+        # together are embedded in one batch.
+        self.advisor_scheduler = AdvisorScheduler(
+            lambda texts: self.embeddings.embed_documents(texts), max_concurrent=2, max_queue=8
+        )
+
+        # Concurrent price fetching settings (used by get_portfolio_data)
+        self.price_fetch_max_workers = 8   # Max requests in flight at once
+        self.price_fetch_timeout = 10.0    # Seconds allowed per symbol
+
+        # One pooled client for every backend call. The pool has room for the
+        # price fetch workers plus the quote cache refreshes and UI workers.
+        self.backend = BackendClient(self.api_base_url, pool_size=self.price_fetch_max_workers * 2)
+        # None = not probed yet, False = backend has no batch quote endpoint
+        self.batch_quotes_supported = None
+
+        # Quote cache shared by every price lookup
+        self.quote_cache = QuoteCache(ttl=15.0, stale_ttl=300.0, max_size=500)
+        # Synthetic prices used when the API has no history - the same data
+        # models/mock_backend_server.py serves
+        self.synthetic_market = SyntheticMarket()
+
+        # Local files (price history, etc.) live in <project>/cache
+        self.cache_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "cache")
+        try:
+            self.history_store = HistoryStore(os.path.join(self.cache_dir, "history.sqlite3"))
+        except Exception as e:
+            print(f"Could not open history store, keeping history in memory: {e}")
+            self.history_store = HistoryStore(":memory:")
 
         self.users = {
         "maoz": "3242",
@@ -43,8 +137,56 @@ class MockStockModel:
         self.vectorstore = None
         self.embeddings = None
 
-        print("📚 Initializing RAG system...")
-        self._init_rag() 
+        # RAG settings - changing any of them rebuilds the persisted index
+        self.rag_chunk_size = 500       # Smaller chunks for more precise retrieval
+        self.rag_chunk_overlap = 50
+        self.rag_chunk_separator = "\n"
+        self.rag_embedding_model = "sentence-transformers/all-MiniLM-L6-v2"
+        # Indexing throughput settings (don't affect the index contents)
+        self.rag_embed_batch_size = 64     # Chunks per embedding batch
+        self.rag_embed_threads = None      # torch intra-op threads, None = library default
+        self.rag_parse_workers = None      # Processes parsing documents, None = CPU count - 1
+        # "flat" = exact search, "ivf" or "hnsw" = approximate search for large
+        # libraries (see rag_index.build_index for rag_index_params).
+        # get_rag_index_report() measures recall and latency against exact search.
+        self.rag_index_type = "flat"
+        self.rag_index_params = {}
+        # "hybrid" fuses BM25 keyword hits with the vector hits, "vector" uses
+        # the vector hits only. Setting rag_rerank_model (e.g.
+        # "cross-encoder/ms-marco-MiniLM-L-6-v2") reranks the fused candidates
+        # within rag_rerank_budget_ms.
+        self.rag_retrieval_mode = "hybrid"
+        self.rag_rerank_model = None
+        self.rag_rerank_budget_ms = 150
+        self.hybrid_retriever = None
+        self.rag_indexing_stats = None     # Filled in after the index is built
+
+        # Every PDF, .txt and .md file in this folder is indexed, and the
+        # folder is polled for changes while the app runs
+        self.knowledge_base_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "knowledge_base")
+        self.knowledge_base_watch_interval = 10.0
+        self.knowledge_base = None
+
+        # RAG is initialized on a background thread by start_rag_init(), so
+        # creating the model (and logging in) never waits for it
+        self.rag_state = "not_started"   # -> "loading" -> "ready" / "failed"
+        self.rag_wait_timeout = 5.0      # Max seconds get_ai_advice waits for RAG
+        self._rag_ready_event = threading.Event()
+        self._rag_thread = None
+        self._rag_lock = threading.Lock()
+        self._rag_state_listeners = []
+        self.rag_index_key = None        # Identifies the knowledge base in use
+
+        # Retrieved chunks are deduplicated and trimmed to fit the prompt
+        # budget - a shorter prompt means a faster prefill in Ollama
+        self.rag_max_chunks = 5
+        self.prompt_budget = PromptBudget(max_prompt_tokens=1024)
+
+        # Answers to questions similar to earlier ones are reused while the
+        # knowledge base is unchanged
+        self.answer_cache = AnswerCache(
+            os.path.join(self.cache_dir, "answer_cache.pkl"), threshold=0.92, max_entries=200
+        )
 
 
     def search_symbol_by_name(self, company_name):
@@ -56,7 +198,7 @@ class MockStockModel:
             print(f"Searching for symbol by company name: {company_name}")
             
             # Call the API endpoint
-            response = requests.get(
+            response = self.backend.get(
             f"{self.api_base_url}/stock/queries/search",
             params={"name": company_name}
         )
@@ -90,7 +232,8 @@ class MockStockModel:
     
     def get_stock_history(self, symbol, start_date=None, end_date=None):
         """
-        Get stock price history from the API
+        Get stock price history, using the local history store
+        Only the dates that are not stored yet are requested from the API.
         Returns a list of historical price data points
         """
         try:
@@ -100,51 +243,97 @@ class MockStockModel:
             
             print(f"Getting stock history for {symbol} from {start_date} to {end_date}")
             
-            # Call the API endpoint
-            response = requests.get(
-            f"{self.api_base_url}/stock/queries/yahoo-history/{symbol}",
-            params={"from": start_date, "to": end_date}
-        )
+            # Fetch only the missing date ranges and add them to the store
+            fetch_failed = False
+            for range_start, range_end in self.history_store.missing_ranges(symbol, start_date, end_date):
+                bars = self._fetch_history_bars(symbol, range_start, range_end)
+                if bars is None:
+                    fetch_failed = True
+                    break
+                self.history_store.save_bars(symbol, bars, range_start, range_end)
             
-            if response.status_code == 200:
-                history_data = response.json()
-                chart_data = []
-                for record in history_data:
-                    # Convert date string to timestamp
-                    date = datetime.fromisoformat(record["date"].replace("Z", "+00:00"))
-                    timestamp = int(date.timestamp() * 1000)  # Milliseconds for QDateTime
-                    close_price = record["close"]
-                    chart_data.append((timestamp, close_price))
-                
+            # If a delta request failed, stored bars are still better than nothing
+            chart_data = self.history_store.load_bars(symbol, start_date, end_date)
+            if chart_data or not fetch_failed:
                 return chart_data
-                    
-            else:
-                print(f"API error: {response.status_code} - {response.text}")
-                # Generate mock data as fallback
-                return self.generate_mock_history(symbol)
+            
+            # Generate mock data as fallback
+            return self.generate_mock_history(symbol, start_date, end_date)
                     
         except Exception as e:
             print(f"Error getting stock history: {str(e)}")
             # Generate mock data as fallback
-            return self.generate_mock_history(symbol)
+            return self.generate_mock_history(symbol, start_date, end_date)
+    
+    def generate_mock_history(self, symbol, start_date=None, end_date=None):
+        """
+        Synthetic price history used when the API is unavailable
+        Returns (timestamp_ms, close) tuples like get_stock_history.
+        """
+        print(f"Using synthetic history for {symbol}")
+        return self.synthetic_market.history_bars(symbol, start_date, end_date)
+    
+    def _fetch_history_bars(self, symbol, start_date, end_date):
+        """
+        Fetch a date range of history from the API
+        Returns a list of (day, timestamp_ms, close) tuples, or None on failure,
+        including when the backend can't be reached
+        """
+        print(f"Fetching history for {symbol} from API: {start_date} to {end_date}")
         
-    def get_current_price(self, symbol):
-        """Get current price for a stock"""
         try:
-            response = requests.get(f"{self.api_base_url}/stock/queries/price/{symbol}")
+            # Call the API endpoint
+            response = self.backend.get(
+                f"{self.api_base_url}/stock/queries/yahoo-history/{symbol}",
+                params={"from": start_date, "to": end_date}
+            )
+            
+            if response.status_code != 200:
+                print(f"API error: {response.status_code} - {response.text}")
+                return None
+            
+            return self._parse_history_records(response.json())
+        except Exception as e:
+            print(f"Error fetching history for {symbol}: {str(e)}")
+            return None
+    
+    def _parse_history_records(self, records):
+        """Convert API history records to (day, timestamp_ms, close) tuples"""
+        bars = []
+        for record in records:
+            # Convert date string to timestamp
+            date = datetime.fromisoformat(record["date"].replace("Z", "+00:00"))
+            timestamp = int(date.timestamp() * 1000)  # Milliseconds for QDateTime
+            bars.append((record["date"][:10], timestamp, record["close"]))
+        
+        return bars
+        
+    def get_current_price(self, symbol, allow_stale=True):
+        """
+        Get current price for a stock from the quote cache
+        With allow_stale=True the last known price is returned instantly and
+        refreshed in the background. Use allow_stale=False when placing orders.
+        Returns an EstimatedPrice when no live quote is available.
+        """
+        return self.quote_cache.get(symbol, self._fetch_current_price, allow_stale=allow_stale)
+
+    def get_quote_cache_stats(self):
+        """Return hit/miss/refresh counters of the quote cache"""
+        return self.quote_cache.stats()
+
+    def _fetch_current_price(self, symbol):
+        """
+        Fetch the current price for a stock from the API
+        When the price API fails, the last close or a default is returned as
+        an EstimatedPrice, which the quote cache does not store.
+        """
+        try:
+            response = self.backend.get(f"{self.api_base_url}/stock/queries/price/{symbol}")
             
             if response.status_code == 200:
-                price_data = response.json()
-                
-                # Check for different possible field names
-                if "currentPrice" in price_data:
-                    print(f"Found currentPrice for {symbol}: {price_data['currentPrice']}")
-                    return price_data["currentPrice"]
-                elif "price" in price_data:  
-                    print(f"Found price for {symbol}: {price_data['price']}")
-                    return price_data["price"]
-                else:
-                    print(f"No price field found in response for {symbol}")
+                price = self._parse_price(symbol, response.json())
+                if price is not None:
+                    return price
             else:
                 print(f"API error for {symbol} price: {response.status_code} - {response.text}")
             
@@ -156,11 +345,11 @@ class MockStockModel:
                 # Get the most recent closing price from the tuple (timestamp, close_price)
                 latest_price = raw_history[-1][1]
                 print(f"Using latest closing price from Yahoo history for {symbol}: {latest_price}")
-                return latest_price
+                return EstimatedPrice(latest_price)
             
             # If everything fails, use generic default
             print(f"All price sources failed. Using default price (100.0) for {symbol}")
-            return 100.0
+            return EstimatedPrice(100.0)
                     
         except Exception as e:
             print(f"Error getting current price for {symbol}: {str(e)}")
@@ -173,12 +362,110 @@ class MockStockModel:
                 if raw_history and len(raw_history) > 0:
                     latest_price = raw_history[-1][1]
                     print(f"Using latest closing price after exception for {symbol}: {latest_price}")
-                    return latest_price
+                    return EstimatedPrice(latest_price)
             except Exception as history_error:
                 print(f"Error getting historical price: {history_error}")
             
             # Final fallback
-            return 100.0
+            return EstimatedPrice(100.0)
+
+    def _parse_price(self, symbol, price_data):
+        """Read the price from a price API response. Returns None if missing."""
+        # Check for different possible field names
+        if "currentPrice" in price_data:
+            print(f"Found currentPrice for {symbol}: {price_data['currentPrice']}")
+            return price_data["currentPrice"]
+        elif "price" in price_data:  
+            print(f"Found price for {symbol}: {price_data['price']}")
+            return price_data["price"]
+        else:
+            print(f"No price field found in response for {symbol}")
+            return None
+
+    def get_current_prices(self, symbols, allow_stale=True):
+        """
+        Get current prices for several stocks with a single batch request
+        Cached prices are used where possible, and only the remaining symbols
+        are requested. Falls back to parallel per-symbol calls when the backend
+        has no batch endpoint or leaves symbols out of its response.
+        Returns a dict of {symbol: price}
+        """
+        unique_symbols = [s for s in dict.fromkeys(symbols) if s]
+        prices = {}
+        if not unique_symbols:
+            return prices
+        
+        # Serve what we can from the cache
+        to_fetch = []
+        for symbol in unique_symbols:
+            value = self.quote_cache.get_cached(symbol, self._fetch_current_price, allow_stale)
+            if value is not None:
+                prices[symbol] = value
+            else:
+                to_fetch.append(symbol)
+        
+        if to_fetch and self.batch_quotes_supported is not False:
+            batch_prices = self._fetch_batch_prices(to_fetch)
+            for symbol, price in batch_prices.items():
+                self.quote_cache.put(symbol, price)
+            prices.update(batch_prices)
+        
+        missing = [s for s in to_fetch if s not in prices]
+        if missing:
+            print(f"Fetching {len(missing)} prices individually: {missing}")
+            prices.update(self._fetch_prices_concurrently(missing, fetch_price=self._fetch_and_cache_price))
+        
+        return prices
+    
+    def _fetch_and_cache_price(self, symbol):
+        """Fetch a price from the API, bypassing the cache lookup, and store it"""
+        price = self._fetch_current_price(symbol)
+        self.quote_cache.put(symbol, price)
+        return price
+    
+    def _fetch_batch_prices(self, symbols):
+        """Call the multi-symbol price endpoint. Returns {} if it is unavailable."""
+        try:
+            response = self.backend.get(
+                f"{self.api_base_url}/stock/queries/prices",
+                params={"symbols": ",".join(symbols)}
+            )
+            
+            # Endpoint not implemented by this backend - stop trying
+            if response.status_code in (404, 405, 501):
+                print(f"Batch price endpoint not supported ({response.status_code}), using per-symbol calls")
+                self.batch_quotes_supported = False
+                return {}
+            
+            if response.status_code != 200:
+                print(f"Batch price API error: {response.status_code} - {response.text}")
+                return {}
+            
+            self.batch_quotes_supported = True
+            prices = self._parse_batch_prices(response.json())
+            print(f"Got {len(prices)}/{len(symbols)} prices from batch endpoint")
+            return prices
+        
+        except Exception as e:
+            print(f"Error getting batch prices: {str(e)}")
+            return {}
+    
+    def _parse_batch_prices(self, data):
+        """Read {symbol: price} from a batch price API response"""
+        # Accept either a list of quote objects or a {symbol: price} mapping
+        if isinstance(data, dict):
+            records = [{"symbol": key, "price": value} for key, value in data.items()]
+        else:
+            records = data
+        
+        prices = {}
+        for record in records:
+            symbol = record.get("Symbol") or record.get("symbol")
+            price = record.get("currentPrice", record.get("price"))
+            if symbol and price is not None:
+                prices[symbol] = float(price)
+        return prices
+
     def get_trade_chart_data(self):
         """Get chart data for trade history visualization"""
         chart_data = []
@@ -228,7 +515,7 @@ class MockStockModel:
             # Change the endpoint to use the new query controller
             url = f"{self.api_base_url}/transaction/queries/portfolio/{user_id}"
             print(f"Fetching portfolio data from: {url}")
-            response = requests.get(url)
+            response = self.backend.get(url)
             if response.status_code == 200:
                 portfolio_items = response.json()
                 print("Portfolio data received:", portfolio_items)
@@ -239,6 +526,14 @@ class MockStockModel:
             print(f"Error getting portfolio data: {e}")
             portfolio_items = []
         
+        # Resolve all position prices in one batch request
+        symbols = [item.get("Symbol") or item.get("symbol") for item in portfolio_items]
+        prices = self.get_current_prices(symbols)
+        
+        return self._build_portfolio_rows(portfolio_items, prices)
+    
+    def _build_portfolio_rows(self, portfolio_items, prices):
+        """Combine API portfolio items with current prices and calculate totals"""
         # Process the data and calculate totals
         result = []
         total_portfolio_value = 0.0
@@ -251,7 +546,7 @@ class MockStockModel:
             avg_buy_price = float(item.get("AverageBuyPrice") or item.get("averageBuyPrice") or 0)
             
             # Get current price
-            current_price = self.get_current_price(symbol)
+            current_price = prices.get(symbol, 100.0)
             
             # Calculate values for this position
             market_value = current_price * quantity
@@ -286,6 +581,55 @@ class MockStockModel:
         
         return result
 
+    def _fetch_prices_concurrently(self, symbols, max_workers=None, timeout=None, fetch_price=None):
+        """
+        Fetch current prices for many symbols using a bounded thread pool
+        Returns a dict of {symbol: price}. Symbols that exceed the per-symbol
+        timeout get the same default price (EstimatedPrice(100.0)) as get_current_price.
+        """
+        fetch_price = fetch_price or self.get_current_price
+        max_workers = max_workers or self.price_fetch_max_workers
+        timeout = timeout if timeout is not None else self.price_fetch_timeout
+        unique_symbols = [s for s in dict.fromkeys(symbols) if s]
+        prices = {}
+        if not unique_symbols:
+            return prices
+        
+        start_time = time.time()
+        started_at = {}
+        
+        def fetch(symbol):
+            started_at[symbol] = time.time()
+            return fetch_price(symbol)
+        
+        # Threads are not daemonic, so don't wait for stragglers on shutdown
+        executor = ThreadPoolExecutor(max_workers=min(max_workers, len(unique_symbols)))
+        try:
+            pending = {executor.submit(fetch, symbol): symbol for symbol in unique_symbols}
+            while pending:
+                done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                for future in done:
+                    symbol = pending.pop(future)
+                    try:
+                        prices[symbol] = future.result()
+                    except Exception as e:
+                        print(f"Error fetching price for {symbol}: {e}")
+                        prices[symbol] = EstimatedPrice(100.0)
+                
+                # Give up on symbols that have been running longer than the timeout
+                now = time.time()
+                for future, symbol in list(pending.items()):
+                    if symbol in started_at and now - started_at[symbol] > timeout:
+                        print(f"Price fetch for {symbol} timed out after {timeout}s, using default price")
+                        prices[symbol] = EstimatedPrice(100.0)
+                        future.cancel()
+                        del pending[future]
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        print(f"Fetched {len(prices)} prices in {time.time() - start_time:.2f} seconds")
+        return prices
+
     def _get_caller_info(self):
         """Helper method to identify who is calling a method"""
         import traceback
@@ -297,6 +641,10 @@ class MockStockModel:
     def buy_stock(self, stock, quantity, price):
         print(f"Buying stock: {stock}, quantity: {quantity}, price: {price}")
         
+        if isinstance(price, EstimatedPrice):
+            print(f"❌ Refusing to buy {stock}: {price:.2f} is an estimate, not a live quote")
+            return False
+        
         transaction_data = {
             "UserId": getattr(self, "user_id", 1), 
             "Symbol": stock,
@@ -307,7 +655,7 @@ class MockStockModel:
 
         try:
             # Change the endpoint to use the new command controller
-            response = requests.post(f"{self.api_base_url}/transaction/commands/add", json=transaction_data)
+            response = self.backend.post(f"{self.api_base_url}/transaction/commands/add", json=transaction_data)
             if response.status_code == 200 or response.status_code == 201:
                 print("Transaction recorded in the database successfully.")
                 
@@ -342,6 +690,10 @@ class MockStockModel:
     def sell_stock(self, stock, quantity, price):
         print(f"Selling stock: {stock}, quantity: {quantity}, price: {price}")
         
+        if isinstance(price, EstimatedPrice):
+            print(f"❌ Refusing to sell {stock}: {price:.2f} is an estimate, not a live quote")
+            return False
+        
         # 1. Record transaction via API
         transaction_data = {
             "UserId": getattr(self, "user_id", 1),
@@ -353,7 +705,7 @@ class MockStockModel:
         
         try:
             # Change the endpoint to use the new command controller
-            response = requests.post(f"{self.api_base_url}/transaction/commands/add", json=transaction_data)
+            response = self.backend.post(f"{self.api_base_url}/transaction/commands/add", json=transaction_data)
             if response.status_code == 200 or response.status_code == 201:
                 print("Transaction recorded in the database successfully.")
                 
@@ -411,45 +763,105 @@ class MockStockModel:
         ]
         return filtered_trades
 
+    def start_rag_init(self):
+        """Start initializing RAG on a background thread. Does nothing if already started."""
+        with self._rag_lock:
+            if self._rag_thread is not None:
+                return
+            self._rag_thread = threading.Thread(target=self._init_rag_worker, name="rag-init", daemon=True)
+        self._set_rag_state("loading")
+        self._rag_thread.start()
+
+    def _init_rag_worker(self):
+        """Background thread body for start_rag_init"""
+        print("📚 Initializing RAG system...")
+        success = self._init_rag()
+        self._set_rag_state("ready" if success else "failed")
+        self._rag_ready_event.set()
+
+    def wait_for_rag(self, timeout=None):
+        """Wait until RAG initialization has finished. Returns True if RAG is ready."""
+        self._rag_ready_event.wait(timeout)
+        return self.rag_ready
+
+    def add_rag_state_listener(self, callback):
+        """Call callback(state) whenever rag_state changes (from a background thread)"""
+        self._rag_state_listeners.append(callback)
+
+    def remove_rag_state_listener(self, callback):
+        if callback in self._rag_state_listeners:
+            self._rag_state_listeners.remove(callback)
+
+    def _set_rag_state(self, state):
+        self.rag_state = state
+        for callback in list(self._rag_state_listeners):
+            try:
+                callback(state)
+            except Exception as e:
+                print(f"⚠️ RAG state listener failed: {e}")
+
     def _init_rag(self):
         """Initialize the RAG components with careful error handling and timing"""
         start_time = time.time()
         
         try:
-            # 1. Find the PDF file
-            pdf_path = self._find_pdf_file()
-            if not pdf_path:
-                print("❌ Could not find the investment PDF file")
-                return False
-            
-            print(f"📄 Found PDF at: {pdf_path}")
+            # RAG imports
+            from models.rag_index import LazyHuggingFaceEmbeddings
+            from models.embedding_cache import EmbeddingCache, CachedEmbeddings
+            from models.knowledge_base import KnowledgeBase
+            from models.hybrid_retriever import HybridRetriever
             
-            # 2. Load the PDF content
-            print("📖 Loading PDF content...")
-            loader = PyPDFLoader(pdf_path)
-            documents = loader.load()
-            print(f"✅ Loaded {len(documents)} pages from PDF")
+            # 1. Index the knowledge base folder plus the bundled reference PDF
+            os.makedirs(self.knowledge_base_dir, exist_ok=True)
+            sources = [self.knowledge_base_dir]
+            pdf_path = self._find_pdf_file()
+            if pdf_path:
+                print(f"📄 Found PDF at: {pdf_path}")
+                sources.append(pdf_path)
             
-            # 3. Split into chunks for better retrieval
-            print("✂️ Splitting document into chunks...")
-            text_splitter = CharacterTextSplitter(
-                chunk_size=500,  # Smaller chunks for more precise retrieval
-                chunk_overlap=50, 
-                separator="\n"
+            # 2. The embeddings model is only loaded when a query needs it, and
+            # texts that were embedded before are read from the embedding cache
+            self.embeddings = CachedEmbeddings(
+                LazyHuggingFaceEmbeddings(
+                    self.rag_embedding_model,
+                    batch_size=self.rag_embed_batch_size,
+                    num_threads=self.rag_embed_threads
+                ),
+                EmbeddingCache(os.path.join(self.cache_dir, "embeddings"), self.rag_embedding_model)
             )
-            chunks = text_splitter.split_documents(documents)
-            print(f"✅ Created {len(chunks)} text chunks")
             
-            # 4. Create embeddings
-            print("🔤 Initializing embeddings model...")
-            self.embeddings = HuggingFaceEmbeddings(
-                model_name="sentence-transformers/all-MiniLM-L6-v2"
+            # 3. Load the persisted index and only ingest files that changed
+            knowledge_base = KnowledgeBase(
+                sources, os.path.join(self.cache_dir, "rag_index"), self.embeddings,
+                self.rag_chunk_size, self.rag_chunk_overlap, self.rag_chunk_separator,
+                self.rag_embedding_model, batch_size=self.rag_embed_batch_size,
+                parse_workers=self.rag_parse_workers,
+                index_type=self.rag_index_type, index_params=self.rag_index_params
             )
+            knowledge_base.load()
+            knowledge_base.sync()
+            if knowledge_base.is_empty:
+                print(f"❌ No documents found in {self.knowledge_base_dir}")
+                return False
+            
+            self.knowledge_base = knowledge_base
+            self.vectorstore = knowledge_base
+            self.rag_index_key = knowledge_base.content_key
+            self.rag_indexing_stats = knowledge_base.last_sync_stats
+            
+            # 4. Build the keyword index now, so the first query doesn't pay for it
+            if self.rag_retrieval_mode == "hybrid":
+                self.hybrid_retriever = HybridRetriever(
+                    knowledge_base, self.embeddings, rerank_model=self.rag_rerank_model,
+                    rerank_budget_ms=self.rag_rerank_budget_ms
+                )
+                self.hybrid_retriever.refresh()
             
-            # 5. Create vector store
-            print("🗄️ Creating vector store...")
-            self.vectorstore = FAISS.from_documents(chunks, self.embeddings)
-            print("✅ Vector store created successfully")
+            # 5. Pick up files added to the folder while the app runs
+            knowledge_base.start_watching(self.knowledge_base_watch_interval, on_change=self._knowledge_base_changed)
+            
+            # 6. Load the embeddings model now, so the first query doesn't pay for it
+            self.embeddings.model
             
             self.rag_ready = True
             end_time = time.time()
@@ -460,8 +872,20 @@ class MockStockModel:
             print(f"❌ Error initializing RAG: {e}")
             return False
     
+    def get_rag_index_report(self, k=5, queries=200):
+        """Measure recall@k and query latency of the knowledge base index against exact search"""
+        if self.knowledge_base is None:
+            return None
+        return self.knowledge_base.evaluate_index(k=k, queries=queries)
+    
+    def _knowledge_base_changed(self, stats):
+        """Called by the knowledge base watcher after files were ingested"""
+        # Cached answers were based on the old documents
+        self.rag_index_key = self.knowledge_base.content_key
+        self.rag_indexing_stats = stats
+    
     def _find_pdf_file(self):
-        """Find the investment PDF file in various possible locations"""
+        """Find the bundled investment PDF file in various possible locations"""
         possible_paths = [
             # Common locations relative to the current file
             os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "assets", "gemma_value_investing_reference.pdf"),
@@ -475,45 +899,59 @@ class MockStockModel:
                 return path
         
         return None
-    def _get_relevant_context(self, query, max_chunks=5):
-        """Get the most relevant context from the vector store"""
+    def _get_relevant_context(self, query, max_chunks=5, query_vector=None):
+        """
+        Get the most relevant context from the vector store
+        Pass query_vector if the query has already been embedded.
+        """
+        return "\n".join(self._get_relevant_chunks(query, max_chunks, query_vector))
+    
+    def _get_relevant_chunks(self, query, max_chunks=5, query_vector=None):
+        """Get the text of the most relevant chunks, best first"""
         if not self.rag_ready or not self.vectorstore:
             print("⚠️ RAG system not initialized, skipping context retrieval")
-            return ""
+            return []
         
         try:
             print(f"🔍 Finding relevant context for query: {query}")
             start_time = time.time()
             
-            # Get documents from vector store
-            relevant_docs = self.vectorstore.similarity_search(
-                query, 
-                k=max_chunks  # Limit to top relevant chunks
-            )
+            # Get documents from the hybrid retriever or the vector store
+            if self.hybrid_retriever is not None:
+                relevant_docs = self.hybrid_retriever.search(query, k=max_chunks, query_vector=query_vector)
+            elif query_vector is not None:
+                relevant_docs = self.vectorstore.similarity_search_by_vector(query_vector, k=max_chunks)
+            else:
+                relevant_docs = self.vectorstore.similarity_search(
+                    query, 
+                    k=max_chunks  # Limit to top relevant chunks
+                )
             
-            # Extract and join the content
-            context = "\n".join([doc.page_content for doc in relevant_docs])
+            chunks = [doc.page_content for doc in relevant_docs]
             
             end_time = time.time()
             print(f"✅ Retrieved {len(relevant_docs)} relevant chunks in {end_time - start_time:.2f} seconds")
             
             # Print a preview of the retrieved context
+            context = "\n".join(chunks)
             preview = context[:100] + "..." if len(context) > 100 else context
             print(f"📑 Context preview: {preview}")
             
-            return context
+            return chunks
             
         except Exception as e:
             print(f"❌ Error retrieving context: {e}")
-            return ""
+            return []
     
-    def get_ai_advice(self, query, context=None):
+    def get_ai_advice(self, query, context=None, metrics=None):
         """
         Get AI investment advice using RAG with PDF knowledge
         
         Args:
             query (str): The user's investment question
             context (dict, optional): Additional context like portfolio data
+            metrics (dict, optional): Filled with this question's queue time,
+                token counts and timings
             
         Returns:
             str: Investment advice from the AI model
@@ -528,90 +966,298 @@ class MockStockModel:
         
         print(f"❓ Processing query: '{query}'")
         
+        cached_answer, query_vector, cache_scope = self._lookup_cached_answer(query, context)
+        if cached_answer is not None:
+            if metrics is not None:
+                metrics["cached"] = True
+            return cached_answer
+        
         try:
-            # 1. Get relevant context from our knowledge base
-            knowledge_context = self._get_relevant_context(query)
-            
-            # 2. Add user context if available
-            user_context = ""
-            if context:
-                user_context = "User context: " + ". ".join([f"{key}: {value}" for key, value in context.items()])
-                print(f"👤 Added user context: {user_context}")
-            
-            # 3. Prepare the prompt with context and clear instructions
-            prompt = f"""Question: {query}
-
-Knowledge context: {knowledge_context}
-
-{user_context}
-
-Based on the provided knowledge context, explain the main reasons why {query.lower()} Answer in 2-3 complete sentences without repetition."""
-            
-            # 4. Call Ollama API with timeout limit
-            print("🤖 Calling Ollama API...")
-            api_url = "http://localhost:11434/api/chat"
-            
-            payload = {
-    "model": "gemma:2b",
-    "messages": [
-        {
-            "role": "system",
-            "content": "You are an investment advisor who provides concise, factual answers. Avoid repetition and focus on the most important points from the provided context."
-        },
-        {
-            "role": "user",
-            "content": prompt
-        }
-    ],
-    "stream": False,
-    "options": {
-        "temperature": 0.2,    # Slightly higher to reduce repetition loops
-        "max_tokens": 150,     # More limited to prevent runaway repetition 
-        "top_p": 0.85,         # Slightly lower for more focused responses
-        "frequency_penalty": 1.0  # Add this to discourage repetition
-    }
-}
+            messages, retrieval_note, context_info = self._prepare_advice_request(
+                query, context, query_vector=query_vector
+            )
             
-            # Set a reasonable timeout to prevent UI freezing (adjust as needed)
-            response = requests.post(api_url, json=payload, timeout=45)
+            # 4. Call the LLM once a slot is free (the backend sets a timeout
+            # to prevent UI freezing)
+            context_info["queue_ms"] = self._acquire_llm_slot()
+            try:
+                print(f"🤖 Calling {self.llm_backend.name}...")
+                result = self.llm_backend.chat(messages, self.llm_options)
+            finally:
+                self.advisor_scheduler.release()
             
-            if response.status_code == 200:
-                result = response.json()
-                if "message" in result and "content" in result["message"]:
-                    answer = result["message"]["content"]
-                    # Calculate and log the response time
-                    end_time = time.time()
-                    print(f"✅ Got response in {end_time - start_time:.2f} seconds")
-                    print(f"📝 Response length: {len(answer)} characters")
-                    return answer
-                else:
-                    print("⚠️ No content in Ollama response:", result)
-            else:
-                print(f"❌ Ollama API error: {response.status_code} - {response.text}")
+            if "message" in result and "content" in result["message"]:
+                answer = result["message"]["content"]
+                request_metrics = self._log_advice_metrics(messages, result, context_info)
+                if metrics is not None:
+                    metrics.update(request_metrics)
+                # Calculate and log the response time
+                end_time = time.time()
+                print(f"✅ Got response in {end_time - start_time:.2f} seconds")
+                print(f"📝 Response length: {len(answer)} characters")
+                self._store_cached_answer(query, query_vector, answer, cache_scope, retrieval_note)
+                return answer + retrieval_note
             
-            # If we get here, the Ollama API failed
-            raise Exception(f"Failed to get response from Ollama API: {response.status_code}")
+            # If we get here, the LLM returned no answer
+            print("⚠️ No content in LLM response:", result)
+            raise Exception("No content in LLM response")
                 
         except requests.exceptions.Timeout:
             print("⚠️ Ollama API timeout - response took too long")
             return "I apologize, but the response is taking longer than expected. Please try a more specific question or try again later."
             
+        except AdvisorQueueFull as e:
+            print(f"🚦 Advisor busy, question rejected: {e}")
+            return self.ADVISOR_BUSY_MESSAGE
+            
         except Exception as e:
             print(f"❌ Error getting AI advice: {e}")
+            return self._fallback_advice()
+    
+    def stream_ai_advice(self, query, context=None, cancel_token=None, metrics=None):
+        """
+        Streaming version of get_ai_advice
+        Yields the answer in pieces as the LLM generates them, so the first
+        words can be shown long before the whole answer is ready.
+        Cancelling cancel_token (an AdviceCancelToken) from another thread
+        aborts the request and ends the stream without a fallback answer.
+        A metrics dict is filled in once the last token has been received.
+        """
+        start_time = time.time()
+        
+        if not query or query.strip() == "":
+            print("⚠️ Empty query received")
+            yield "Please ask a specific investment question to get advice."
+            return
+        
+        print(f"❓ Processing streaming query: '{query}'")
+        received_any = False
+        
+        cached_answer, query_vector, cache_scope = self._lookup_cached_answer(query, context)
+        if cached_answer is not None:
+            if metrics is not None:
+                metrics["cached"] = True
+            yield cached_answer
+            return
+        
+        try:
+            messages, retrieval_note, context_info = self._prepare_advice_request(
+                query, context, query_vector=query_vector
+            )
+            if cancel_token and cancel_token.cancelled:
+                print("🛑 Advice request cancelled before calling the LLM")
+                return
             
-            # Fallback to random advice messages
-            advices = [
-                "השוק תנודתי - שקול השקעה מבוזרת!",
-                "האם בדקת את המדדים הטכניים לפני הרכישה?",
-                "מומלץ להחזיק מניות לטווח ארוך כדי להפחית סיכונים.",
-                "השקעה במניות טכנולוגיה היא מגמה עכשווית, אך יש לשים לב לסיכונים."
-            ]
-            return random.choice(advices)
+            context_info["queue_ms"] = self._acquire_llm_slot(cancel_token)
+            if context_info["queue_ms"] is None:
+                print("🛑 Advice request cancelled while waiting for the LLM")
+                return
+            try:
+                print(f"🤖 Calling {self.llm_backend.name} (streaming)...")
+                request_start = time.time()
+                first_token_ms = None
+                tokens = []
+                for chunk in self.llm_backend.stream_chat(messages, self.llm_options, cancel_token):
+                    token = chunk.get("message", {}).get("content", "")
+                    if token:
+                        if not received_any:
+                            print(f"⚡ First token after {time.time() - start_time:.2f} seconds")
+                            first_token_ms = (time.time() - request_start) * 1000
+                            received_any = True
+                        tokens.append(token)
+                        yield token
+                    if chunk.get("done"):
+                        # The last chunk carries the token counts and timings
+                        request_metrics = self._log_advice_metrics(messages, chunk, context_info, first_token_ms)
+                        if metrics is not None:
+                            metrics.update(request_metrics)
+            finally:
+                self.advisor_scheduler.release()
+            
+            if cancel_token and cancel_token.cancelled:
+                print("🛑 Advice request cancelled")
+                return
+            print(f"✅ Streamed response in {time.time() - start_time:.2f} seconds")
+            self._store_cached_answer(query, query_vector, "".join(tokens), cache_scope, retrieval_note)
+            if retrieval_note:
+                yield retrieval_note
+        
+        except Exception as e:
+            if cancel_token and cancel_token.cancelled:
+                # Aborting the request makes the blocked read fail
+                print(f"🛑 Advice request cancelled after {time.time() - start_time:.2f} seconds")
+                return
+            if isinstance(e, AdvisorQueueFull):
+                print(f"🚦 Advisor busy, question rejected: {e}")
+                yield self.ADVISOR_BUSY_MESSAGE
+                return
+            if isinstance(e, requests.exceptions.Timeout):
+                print("⚠️ Ollama API timeout - response took too long")
+                if not received_any:
+                    yield "I apologize, but the response is taking longer than expected. Please try a more specific question or try again later."
+                return
+            
+            print(f"❌ Error streaming AI advice: {e}")
+            if not received_any:
+                yield self._fallback_advice()
+    
+    def _prepare_advice_request(self, query, context=None, query_vector=None):
+        """
+        Retrieve the knowledge context and build the chat messages for the LLM
+        Returns a tuple of (messages, retrieval_note, context info dict)
+        """
+        # 1. Get relevant context from our knowledge base, waiting a bounded
+        # time for it if it's still loading
+        retrieval_note = ""
+        if not self.rag_ready:
+            self.start_rag_init()
+            print(f"⏳ Waiting up to {self.rag_wait_timeout}s for the RAG system...")
+            if not self.wait_for_rag(self.rag_wait_timeout):
+                if self.rag_state == "failed":
+                    retrieval_note = "\n\n(Note: the knowledge base is unavailable, so this answer was given without it.)"
+                else:
+                    retrieval_note = "\n\n(Note: the knowledge base is still loading, so this answer was given without it.)"
+        chunks = self._get_relevant_chunks(query, self.rag_max_chunks, query_vector=query_vector)
+        
+        # 2. Add user context if available
+        user_context = ""
+        if context:
+            user_context = "User context: " + ". ".join([f"{key}: {value}" for key, value in context.items()])
+            print(f"👤 Added user context: {user_context}")
+        
+        # 3. Prepare the prompt with context and clear instructions. The
+        # knowledge context gets whatever the rest of the prompt leaves of the budget.
+        system_message = "You are an investment advisor who provides concise, factual answers. Avoid repetition and focus on the most important points from the provided context."
+        prompt_template = f"""Question: {query}
+
+Knowledge context: {{knowledge_context}}
+
+{user_context}
+
+Based on the provided knowledge context, explain the main reasons why {query.lower()} Answer in 2-3 complete sentences without repetition."""
+        reserved_tokens = self.prompt_budget.estimate_tokens(system_message + prompt_template)
+        knowledge_context, context_info = self.prompt_budget.assemble(chunks, reserved_tokens)
+        prompt = prompt_template.replace("{knowledge_context}", knowledge_context)
+        print(f"🧾 Context: {context_info['chunks_used']}/{context_info['chunks_retrieved']} chunks, "
+              f"~{context_info['context_tokens_estimate']}/{context_info['context_token_budget']} tokens, "
+              f"{context_info['overlap_chars_removed']} overlapping characters removed")
+        
+        messages = [
+            {
+                "role": "system",
+                "content": system_message
+            },
+            {
+                "role": "user",
+                "content": prompt
+            }
+        ]
+        return messages, retrieval_note, context_info
+    
+    def _acquire_llm_slot(self, cancel_token=None):
+        """
+        Wait for the scheduler to let this question through to the LLM
+        Returns the milliseconds spent queued, or None if cancelled meanwhile.
+        Raises AdvisorQueueFull if too many questions are already waiting.
+        """
+        queue_ms = self.advisor_scheduler.acquire(cancel_token)
+        if queue_ms is not None and queue_ms >= 1:
+            print(f"⏳ Waited {queue_ms:.0f} ms for an LLM slot")
+        return queue_ms
+    
+    def get_advisor_queue_stats(self):
+        """Return queue time, concurrency and embedding batch counters of the advisor scheduler"""
+        return self.advisor_scheduler.stats()
+    
+    def _log_advice_metrics(self, messages, result, context_info, first_token_ms=None):
+        """
+        Log prompt size, prefill time and generation time reported by the LLM
+        first_token_ms is measured when streaming. Without it the time to the
+        first token is taken as the reported model load plus prefill time.
+        Returns the metrics of this request as a dict.
+        """
+        prompt_text = "".join(message["content"] for message in messages)
+        metrics = ollama_timings(result)
+        if first_token_ms is None:
+            first_token_ms = metrics["load_ms"] + metrics["prefill_ms"]
+        metrics["first_token_ms"] = round(first_token_ms, 1)
+        metrics["start"] = self.llm_backend.record_first_token(first_token_ms, metrics["load_ms"])
+        metrics["prompt_tokens_estimate"] = self.prompt_budget.estimate_tokens(prompt_text)
+        metrics.update(context_info)
+        self.prompt_budget.record_usage(len(prompt_text), metrics["prompt_tokens"])
+        print(f"📊 Prompt {metrics['prompt_tokens']} tokens (estimated {metrics['prompt_tokens_estimate']}), "
+              f"prefill {metrics['prefill_ms']} ms, generation {metrics['generated_tokens']} tokens in "
+              f"{metrics['generation_ms']} ms ({metrics['tokens_per_second']} tokens/sec), model load {metrics['load_ms']} ms")
+        print(f"🌡️ {metrics['start'].capitalize()} start: first token after {metrics['first_token_ms']:.0f} ms")
+        return metrics
+    
+    def warm_up_llm(self):
+        """
+        Load the LLM in the background if it isn't loaded already
+        Called when the AI advisor is opened, so the first question doesn't
+        pay for the model load.
+        """
+        return self.llm_backend.warm_up()
+    
+    def get_llm_latency_report(self):
+        """Return median first-token latency of cold and warm LLM requests"""
+        return self.llm_backend.latency_report()
+    
+    def _lookup_cached_answer(self, query, context=None):
+        """
+        Look the question up in the answer cache
+        Returns a tuple of (cached answer or None, query vector, cache scope).
+        The vector and scope are None while the knowledge base isn't ready,
+        since answers given without it are not cached.
+        """
+        if not self.rag_ready or self.embeddings is None:
+            return None, None, None
+        
+        try:
+            query_vector = self.advisor_scheduler.embed_query(query)
+        except Exception as e:
+            print(f"⚠️ Could not embed query for the answer cache: {e}")
+            return None, None, None
+        
+        # Answers depend on the knowledge base, the LLM and the user context
+        scope = hashlib.sha256(json.dumps(
+            [self.rag_index_key, self.llm_backend.name, context], sort_keys=True, default=str
+        ).encode()).hexdigest()
+        
+        try:
+            answer, similarity = self.answer_cache.lookup(query_vector, scope)
+        except Exception as e:
+            print(f"⚠️ Answer cache lookup failed: {e}")
+            return None, query_vector, scope
+        if answer is not None:
+            stats = self.answer_cache.stats()
+            print(f"💾 Answer cache hit (similarity {similarity:.3f}, hit ratio {stats['hit_ratio']:.0%})")
+        return answer, query_vector, scope
+    
+    def _store_cached_answer(self, query, query_vector, answer, scope, retrieval_note=""):
+        """Cache an answer, unless it was given without the knowledge base"""
+        if query_vector is None or retrieval_note or not answer.strip():
+            return
+        self.answer_cache.store(query, query_vector, answer, scope)
+    
+    def get_answer_cache_stats(self):
+        """Return hit/miss counters of the AI advisor answer cache"""
+        return self.answer_cache.stats()
+    
+    def _fallback_advice(self):
+        """Random advice used when the Ollama API fails"""
+        advices = [
+            "השוק תנודתי - שקול השקעה מבוזרת!",
+            "האם בדקת את המדדים הטכניים לפני הרכישה?",
+            "מומלץ להחזיק מניות לטווח ארוך כדי להפחית סיכונים.",
+            "השקעה במניות טכנולוגיה היא מגמה עכשווית, אך יש לשים לב לסיכונים."
+        ]
+        return random.choice(advices)
         
     def login(self, username, password):
         """Authenticate user"""
         try:
-            response = requests.post(
+            response = self.backend.post(
             f"{self.api_base_url}/auth/queries/login",  # Updated endpoint
             json={"username": username, "password": password}
         )
@@ -643,7 +1289,7 @@ Based on the provided knowledge context, explain the main reasons why {query.low
     def register(self, username, password, email):
         """Register a new user"""
         try:
-            response = requests.post(
+            response = self.backend.post(
                 f"{self.api_base_url}/auth/commands/register",
                 json={"username": username, "password": password, "email": email}
             )
@@ -678,7 +1324,7 @@ Based on the provided knowledge context, explain the main reasons why {query.low
             # Change the endpoint to use the new query controller
             url = f"{self.api_base_url}/transaction/queries/user/{user_id}"
             print(f"Fetching transactions from: {url}")
-            response = requests.get(url)
+            response = self.backend.get(url)
             
             if response.status_code == 200:
                 transactions = response.json()
@@ -706,7 +1352,7 @@ Based on the provided knowledge context, explain the main reasons why {query.low
     def get_company_description(self, symbol):
         """Get company description for a stock symbol"""
         try:
-            response = requests.get(f"{self.api_base_url}/stock/queries/description/{symbol}")
+            response = self.backend.get(f"{self.api_base_url}/stock/queries/description/{symbol}")
             if response.status_code == 200:
                 description = response.text.strip('"')  # Remove quotes if the API returns JSON string
                 print(f"Got description for {symbol}: {description[:50]}...")
@@ -721,7 +1367,7 @@ Based on the provided knowledge context, explain the main reasons why {query.low
     def get_company_profile(self, symbol):
         """Get company profile information for a stock symbol"""
         try:
-            response = requests.get(f"{self.api_base_url}/stock/queries/profile/{symbol}")
+            response = self.backend.get(f"{self.api_base_url}/stock/queries/profile/{symbol}")
             if response.status_code == 200:
                 profile = response.json()
                 print("json is:", profile)
@@ -729,24 +1375,21 @@ Based on the provided knowledge context, explain the main reasons why {query.low
                 return profile
             else:
                 print(f"API error for {symbol} profile: {response.status_code} - {response.text}")
-                return {
-                    "name": symbol,
-                    "industry": "Unknown",
-                    "logoUrl": "",
-                    "exchange": "Unknown",
-                    "webUrl": "",
-                    "country": "Unknown"
-                }
+                return self._default_company_profile(symbol)
         except Exception as e:
             print(f"Error getting company profile for {symbol}: {str(e)}")
-            return {
-                "name": symbol,
-                "industry": "Unknown",
-                "logoUrl": "",
-                "exchange": "Unknown",
-                "webUrl": "",
-                "country": "Unknown"
-            }
+            return self._default_company_profile(symbol)
+
+    def _default_company_profile(self, symbol):
+        """Profile used when the API has no data for a symbol"""
+        return {
+            "name": symbol,
+            "industry": "Unknown",
+            "logoUrl": "",
+            "exchange": "Unknown",
+            "webUrl": "",
+            "country": "Unknown"
+        }
 
     def get_profile_picture_url(self, user_id=None):
         try:
@@ -771,7 +1414,7 @@ Based on the provided knowledge context, explain the main reasons why {query.low
             headers = self.get_auth_headers()
             print(f"Using headers: {headers}")
             
-            response = requests.get(api_url, headers=headers)
+            response = self.backend.get(api_url, headers=headers)
             
             print(f"API response status: {response.status_code}")
             if response.status_code == 200:
@@ -803,8 +1446,9 @@ Based on the provided knowledge context, explain the main reasons why {query.low
     
 if __name__ == "__main__":
     model = MockStockModel()
-    # Wait a moment for initialization to complete
-    time.sleep(2)
+    # Wait for initialization to complete
+    model.start_rag_init()
+    model.wait_for_rag()
     
     # Test with a sample query
     test_query = "What stock P/E limit?"
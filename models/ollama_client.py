@@ -0,0 +1,99 @@
+import re
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class OllamaClient:
+    """
+    HTTP client for a local Ollama server
+
+    Keeps one requests.Session, so advisor questions reuse a keep-alive
+    connection to port 11434 instead of opening a new one each time. Can load
+    a model in the background before the first question (warm_up).
+    """
+
+    def __init__(self, base_url="http://localhost:11434", pool_size=4):
+        self.base_url = base_url.rstrip("/")
+
+        # No retries - a chat request is not idempotent and may take a while
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self._lock = threading.Lock()
+        self._warm_up_thread = None
+        self._last_used = {}   # model -> time.monotonic() of the last request
+
+    def chat(self, payload, stream=False, timeout=(5, 45)):
+        """POST a payload to /api/chat through the shared session and return the response"""
+        self._last_used[payload.get("model")] = time.monotonic()
+        return self.session.post(f"{self.base_url}/api/chat", json=payload, stream=stream, timeout=timeout)
+
+    def warm_up(self, model, keep_alive="30m"):
+        """
+        Load the model into memory on a background thread
+        Does nothing if a warm-up is already running or the model was used
+        recently enough to still be loaded. Returns True if a warm-up started.
+        """
+        with self._lock:
+            if self._warm_up_thread is not None and self._warm_up_thread.is_alive():
+                return False
+            if self._probably_loaded(model, keep_alive):
+                return False
+            self._warm_up_thread = threading.Thread(
+                target=self._warm_up_worker, args=(model, keep_alive), name="ollama-warm-up", daemon=True
+            )
+        self._warm_up_thread.start()
+        return True
+
+    def _warm_up_worker(self, model, keep_alive):
+        """Background thread body for warm_up"""
+        start_time = time.time()
+        print(f"🔥 Warming up {model}...")
+        try:
+            # A generate request without a prompt only loads the model
+            response = self.session.post(
+                f"{self.base_url}/api/generate",
+                json={"model": model, "keep_alive": keep_alive, "stream": False},
+                timeout=(5, 120),
+            )
+            if response.status_code != 200:
+                print(f"⚠️ Ollama warm-up failed: {response.status_code} - {response.text}")
+                return
+            self._last_used[model] = time.monotonic()
+            load_ms = response.json().get("load_duration", 0) / 1e6
+            print(f"🔥 {model} loaded in {time.time() - start_time:.2f} seconds (model load {load_ms:.0f} ms)")
+        except Exception as e:
+            print(f"⚠️ Ollama warm-up failed: {e}")
+
+    def _probably_loaded(self, model, keep_alive):
+        """Whether the model was used within its keep-alive time"""
+        last_used = self._last_used.get(model)
+        if last_used is None:
+            return False
+        seconds = keep_alive_seconds(keep_alive)
+        return seconds is None or time.monotonic() - last_used < seconds
+
+    def close(self):
+        """Close all pooled connections"""
+        self.session.close()
+
+
+def keep_alive_seconds(keep_alive):
+    """
+    Convert an Ollama keep_alive value ("30m", "1h", 300, -1) to seconds
+    Returns None for a negative value, which keeps the model loaded forever.
+    """
+    if isinstance(keep_alive, (int, float)):
+        return None if keep_alive < 0 else float(keep_alive)
+    match = re.fullmatch(r"\s*(-?\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*", str(keep_alive))
+    if not match:
+        return 0.0
+    value = float(match.group(1))
+    if value < 0:
+        return None
+    return value * {"ms": 0.001, "s": 1, "m": 60, "h": 3600}[match.group(2) or "s"]
@@ -0,0 +1,131 @@
+import math
+import threading
+
+
+def dedupe_chunks(chunks, min_overlap=20):
+    """
+    Remove repeated text from retrieved chunks
+    Drops chunks contained in an earlier one, and trims the start of a chunk
+    that repeats the end of an earlier one (or the end that repeats the start),
+    which is what the splitter's chunk overlap produces for neighbouring chunks.
+    Returns a tuple of (chunks, characters removed).
+    """
+    kept = []
+    removed = 0
+    for chunk in chunks:
+        chunk = chunk.strip()
+        if not chunk:
+            continue
+        if any(chunk in earlier for earlier in kept):
+            removed += len(chunk)
+            continue
+
+        for earlier in kept:
+            overlap = _overlap(earlier, chunk, min_overlap)
+            if overlap:
+                chunk = chunk[overlap:]
+                removed += overlap
+            overlap = _overlap(chunk, earlier, min_overlap)
+            if overlap:
+                chunk = chunk[:-overlap]
+                removed += overlap
+        chunk = chunk.strip()
+        if chunk:
+            kept.append(chunk)
+    return kept, removed
+
+
+def _overlap(first, second, min_overlap):
+    """Length of the longest suffix of `first` that is a prefix of `second`"""
+    for length in range(min(len(first), len(second)), min_overlap - 1, -1):
+        if first.endswith(second[:length]):
+            return length
+    return 0
+
+
+class PromptBudget:
+    """
+    Fits retrieved context into a prompt token budget
+
+    Tokens are estimated from the character count. The characters-per-token
+    ratio starts at a typical value for English and is corrected from the
+    prompt token counts Ollama reports, so estimates track the real tokenizer.
+    """
+
+    def __init__(self, max_prompt_tokens=1024, chars_per_token=4.0, min_chunk_tokens=32):
+        self.max_prompt_tokens = max_prompt_tokens
+        self.chars_per_token = chars_per_token
+        self.min_chunk_tokens = min_chunk_tokens
+        self._lock = threading.Lock()
+
+    def estimate_tokens(self, text):
+        return math.ceil(len(text) / self.chars_per_token)
+
+    def assemble(self, chunks, reserved_tokens=0, separator="\n"):
+        """
+        Join chunks, best first, into a context that fits the budget
+        reserved_tokens is what the rest of the prompt needs. The last chunk
+        that fits is cut at a word boundary if there is room for at least
+        min_chunk_tokens of it. Returns a tuple of (context, info dict).
+        """
+        retrieved = len(chunks)
+        chunks, overlap_removed = dedupe_chunks(chunks)
+        budget = self.max_prompt_tokens - reserved_tokens
+        used, parts = 0, []
+        truncated = False
+
+        for chunk in chunks:
+            tokens = self.estimate_tokens(chunk + separator)
+            if used + tokens <= budget:
+                parts.append(chunk)
+                used += tokens
+                continue
+
+            room = budget - used
+            if room >= self.min_chunk_tokens:
+                cut = chunk[:int(room * self.chars_per_token) - len(separator)]
+                cut = cut[:cut.rfind(" ")] if " " in cut else cut
+                parts.append(cut + " ...")
+                used += self.estimate_tokens(parts[-1] + separator)
+            truncated = True
+            break
+
+        info = {
+            "chunks_retrieved": retrieved,
+            "chunks_after_dedupe": len(chunks),
+            "chunks_used": len(parts),
+            "overlap_chars_removed": overlap_removed,
+            "context_tokens_estimate": used,
+            "context_token_budget": budget,
+            "truncated": truncated,
+        }
+        return separator.join(parts), info
+
+    def record_usage(self, prompt_chars, prompt_tokens):
+        """Update the characters-per-token ratio from a real prompt token count"""
+        if not prompt_chars or not prompt_tokens:
+            return
+        with self._lock:
+            # Moving average, so one odd prompt doesn't throw it off
+            self.chars_per_token = 0.8 * self.chars_per_token + 0.2 * (prompt_chars / prompt_tokens)
+
+
+def ollama_timings(result):
+    """
+    Extract token counts and timings from an Ollama /api/chat response
+    (the final chunk when streaming). Ollama reports durations in nanoseconds.
+    """
+    prompt_tokens = result.get("prompt_eval_count")
+    generated_tokens = result.get("eval_count")
+    prefill_ms = result.get("prompt_eval_duration", 0) / 1e6
+    generation_ms = result.get("eval_duration", 0) / 1e6
+    return {
+        "prompt_tokens": prompt_tokens,
+        "prefill_ms": round(prefill_ms, 1),
+        "generated_tokens": generated_tokens,
+        "generation_ms": round(generation_ms, 1),
+        "tokens_per_second": round(generated_tokens / (generation_ms / 1000), 1)
+        if generated_tokens and generation_ms else None,
+        "load_ms": round(result.get("load_duration", 0) / 1e6, 1),
+        "total_ms": round(result.get("total_duration", 0) / 1e6, 1),
+    }
@@ -0,0 +1,169 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+
+class EstimatedPrice(float):
+    """
+    A price that did not come from a live quote (last close or a default)
+    Behaves like a float for display, but is never cached and must not be
+    traded on.
+    """
+
+
+class QuoteCache:
+    """
+    Thread-safe in-process cache for stock quotes
+
+    Entries younger than `ttl` seconds are fresh. Entries older than that but
+    younger than `ttl + stale_ttl` are stale: they are still returned right away
+    while a background refresh fetches the new value (stale-while-revalidate).
+    Anything older is treated as a miss. The cache holds at most `max_size`
+    symbols and evicts the least recently used one when full.
+    """
+
+    def __init__(self, ttl=15.0, stale_ttl=300.0, max_size=500, refresh_workers=4):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_size = max_size
+
+        self._entries = OrderedDict()  # symbol -> (value, stored_at)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._refresh_executor = ThreadPoolExecutor(
+            max_workers=refresh_workers, thread_name_prefix="quote-refresh"
+        )
+
+        # Counters for tuning
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0   # Refreshes that only got an EstimatedPrice
+        self.refresh_errors = 0
+        self.evictions = 0
+
+    def peek(self, symbol):
+        """
+        Look up a symbol without loading it
+        Returns a tuple of (value, state) where state is "fresh", "stale" or None
+        """
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is None:
+                return None, None
+
+            value, stored_at = entry
+            age = time.time() - stored_at
+            if age <= self.ttl:
+                state = "fresh"
+            elif age <= self.ttl + self.stale_ttl:
+                state = "stale"
+            else:
+                # Too old to be useful at all
+                del self._entries[symbol]
+                return None, None
+
+            self._entries.move_to_end(symbol)
+            return value, state
+
+    def get(self, symbol, loader, allow_stale=True):
+        """
+        Get a quote, calling loader(symbol) on a miss
+        With allow_stale=True a stale value is returned immediately and
+        refreshed in the background; otherwise it is reloaded synchronously.
+        """
+        value = self.get_cached(symbol, loader, allow_stale)
+        if value is not None:
+            return value
+
+        value = loader(symbol)
+        self.put(symbol, value)
+        return value
+
+    def get_cached(self, symbol, loader, allow_stale=True):
+        """
+        Like get(), but returns None on a miss instead of loading synchronously
+        The loader is only used for the background refresh of stale entries.
+        """
+        value, state = self.peek(symbol)
+
+        if state == "fresh":
+            self._count("hits")
+            return value
+
+        if state == "stale" and allow_stale:
+            self._count("stale_hits")
+            self.refresh_async(symbol, loader)
+            return value
+
+        self._count("misses")
+        return None
+
+    def put(self, symbol, value):
+        """
+        Store a quote and evict the least recently used entries if full
+        Estimated prices are ignored, so the next lookup tries the API again.
+        """
+        if isinstance(value, EstimatedPrice):
+            return
+        with self._lock:
+            self._entries[symbol] = (value, time.time())
+            self._entries.move_to_end(symbol)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def refresh_async(self, symbol, loader):
+        """Reload a symbol on a background thread unless a refresh is already running"""
+        with self._lock:
+            if symbol in self._refreshing:
+                return
+            self._refreshing.add(symbol)
+
+        def refresh():
+            try:
+                value = loader(symbol)
+                if isinstance(value, EstimatedPrice):
+                    # No live quote - the stale entry is kept as it is
+                    self._count("refresh_failures")
+                    return
+                self.put(symbol, value)
+                self._count("refreshes")
+            except Exception as e:
+                print(f"Background quote refresh failed for {symbol}: {e}")
+                self._count("refresh_errors")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(symbol)
+
+        self._refresh_executor.submit(refresh)
+
+    def invalidate(self, symbol=None):
+        """Drop one symbol, or the whole cache when no symbol is given"""
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(symbol, None)
+
+    def stats(self):
+        """Return the cache counters as a dict"""
+        with self._lock:
+            lookups = self.hits + self.stale_hits + self.misses
+            return {
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "refresh_failures": self.refresh_failures,
+                "refresh_errors": self.refresh_errors,
+                "evictions": self.evictions,
+                "size": len(self._entries),
+                "hit_ratio": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+            }
+
+    def _count(self, counter):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
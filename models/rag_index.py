@@ -0,0 +1,323 @@
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+import time
+
+import faiss
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_community.vectorstores import FAISS
+
+
+# Supported FAISS index types: exact search, inverted file lists with trained
+# centroids, and a graph index
+INDEX_TYPES = ("flat", "ivf", "hnsw")
+
+INDEX_FILE = "index.faiss"
+DOCSTORE_FILE = "index.pkl"
+META_FILE = "meta.json"
+
+
+class LazyHuggingFaceEmbeddings(Embeddings):
+    """
+    HuggingFaceEmbeddings that loads the sentence-transformer on first use
+
+    A persisted index can be loaded without the embedding model, which is only
+    needed once a query has to be embedded. batch_size is the number of texts
+    the model encodes at once, and num_threads (if set) limits torch's
+    intra-op threads - note that torch applies it to the whole process.
+    """
+
+    def __init__(self, model_name, batch_size=32, num_threads=None, **kwargs):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.num_threads = num_threads
+        self.kwargs = kwargs
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        with self._lock:
+            if self._model is None:
+                # Pulls in sentence-transformers and torch
+                from langchain_community.embeddings import HuggingFaceEmbeddings
+                if self.num_threads:
+                    import torch
+                    torch.set_num_threads(self.num_threads)
+                print(f"🔤 Loading embeddings model {self.model_name}...")
+                encode_kwargs = dict(self.kwargs.pop("encode_kwargs", {}), batch_size=self.batch_size)
+                self._model = HuggingFaceEmbeddings(
+                    model_name=self.model_name, encode_kwargs=encode_kwargs, **self.kwargs
+                )
+            return self._model
+
+    def embed_documents(self, texts):
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.model.embed_query(text)
+
+
+def embed_in_batches(embeddings, chunks, batch_size, on_batch):
+    """
+    Embed a stream of chunks in batches of batch_size
+    `chunks` is any iterable of (text, metadata, doc_id) tuples - it is consumed
+    lazily, so a generator keeps only one batch in memory. on_batch(texts,
+    vectors, metadatas, ids) is called for every embedded batch. Prints
+    progress and returns a stats dict with the throughput.
+    """
+    start_time = time.time()
+    done = 0
+    batch = []
+
+    def flush():
+        nonlocal done
+        texts, metadatas, ids = (list(column) for column in zip(*batch))
+        on_batch(texts, embeddings.embed_documents(texts), metadatas, ids)
+        done += len(batch)
+        batch.clear()
+        elapsed = time.time() - start_time
+        print(f"🧮 Embedded {done} chunks ({done / elapsed if elapsed else 0:.1f} chunks/sec)")
+
+    for chunk in chunks:
+        batch.append(chunk)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    elapsed = time.time() - start_time
+    return {
+        "chunks": done,
+        "batch_size": batch_size,
+        "seconds": round(elapsed, 3),
+        "chunks_per_second": round(done / elapsed, 1) if elapsed else None,
+    }
+
+
+def index_type_of(index):
+    """Return which of INDEX_TYPES a FAISS index is"""
+    if isinstance(index, faiss.IndexIVF):
+        return "ivf"
+    if isinstance(index, faiss.IndexHNSW):
+        return "hnsw"
+    return "flat"
+
+
+def build_index(index_type, vectors, params=None):
+    """
+    Build a FAISS index of index_type holding `vectors` in the same order
+    params (all optional):
+        ivf:  nlist (default 4 * sqrt(n)), nprobe (default 16)
+        hnsw: M (default 32), ef_construction (default 80), ef_search (default 64)
+    """
+    params = params or {}
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    count, dim = vectors.shape
+
+    if index_type == "ivf":
+        # Every centroid needs ~39 training points for k-means to be useful
+        nlist = params.get("nlist") or int(4 * np.sqrt(count))
+        nlist = max(1, min(nlist, count // 39))
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, nlist)
+        sample_size = min(count, nlist * 256)
+        sample = vectors[np.random.default_rng(0).choice(count, sample_size, replace=False)]
+        index.train(sample)
+        index.add(vectors)
+        # Lets the vectors be read back with reconstruct()
+        index.make_direct_map()
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, params.get("M", 32))
+        index.hnsw.efConstruction = params.get("ef_construction", 80)
+        index.add(vectors)
+    elif index_type == "flat":
+        index = faiss.IndexFlatL2(dim)
+        index.add(vectors)
+    else:
+        raise ValueError(f"Unknown index type {index_type!r}, expected one of {INDEX_TYPES}")
+
+    apply_search_params(index, params)
+    return index
+
+
+def apply_search_params(index, params=None):
+    """Set the query-time speed/recall knobs of an IVF or HNSW index"""
+    params = params or {}
+    if isinstance(index, faiss.IndexIVF):
+        index.nprobe = min(params.get("nprobe", 16), index.nlist)
+    elif isinstance(index, faiss.IndexHNSW):
+        index.hnsw.efSearch = params.get("ef_search", 64)
+
+
+def index_vectors(index):
+    """Read every vector back out of an index, in position order"""
+    if isinstance(index, faiss.IndexIVF):
+        index.make_direct_map()
+    return index.reconstruct_n(0, index.ntotal)
+
+
+def delete_from_index(vectorstore, ids, params=None):
+    """
+    Remove documents by ID from a langchain FAISS vector store
+    Flat indexes use FAISS.delete. It assumes positions are renumbered after
+    removal, which IVF doesn't do and HNSW doesn't support, so those are
+    rebuilt from the remaining vectors. An IVF index keeps its trained
+    centroids, but an HNSW graph is rebuilt from scratch.
+    """
+    index = vectorstore.index
+    if index_type_of(index) == "flat":
+        vectorstore.delete(ids)
+        return
+
+    ids = set(ids)
+    keep = [position for position, doc_id in sorted(vectorstore.index_to_docstore_id.items())
+            if doc_id not in ids]
+    vectors = index_vectors(index)[keep]
+    if isinstance(index, faiss.IndexIVF):
+        new_index = faiss.clone_index(index)
+        new_index.reset()
+        new_index.add(vectors)
+        new_index.make_direct_map()
+        apply_search_params(new_index, params)
+    else:
+        new_index = build_index(index_type_of(index), vectors, params)
+
+    vectorstore.docstore.delete([doc_id for doc_id in ids if doc_id in vectorstore.docstore._dict])
+    vectorstore.index_to_docstore_id = {
+        new_position: vectorstore.index_to_docstore_id[old_position]
+        for new_position, old_position in enumerate(keep)
+    }
+    vectorstore.index = new_index
+
+
+def evaluate_index(index, k=5, queries=200, seed=0):
+    """
+    Measure recall@k and per-query latency of an index against exact search
+    Queries are stored vectors with a little noise added, searched one at a
+    time like the app does. Returns a stats dict.
+    """
+    vectors = index_vectors(index)
+    count = len(vectors)
+    if count == 0:
+        return None
+    k = min(k, count)
+
+    rng = np.random.default_rng(seed)
+    sample = vectors[rng.choice(count, min(queries, count), replace=False)]
+    noise = rng.normal(0, vectors.std() * 0.1, sample.shape).astype(np.float32)
+    sample = np.ascontiguousarray(sample + noise)
+
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+
+    def search_all(search_index):
+        latencies, results = [], []
+        for query in sample:
+            start = time.perf_counter()
+            _, ids = search_index.search(query[np.newaxis, :], k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            results.append(ids[0])
+        return np.array(latencies), results
+
+    ann_latencies, ann_results = search_all(index)
+    exact_latencies, exact_results = search_all(exact)
+    recall = np.mean([
+        len(set(found) & set(expected)) / k for found, expected in zip(ann_results, exact_results)
+    ])
+
+    return {
+        "index_type": index_type_of(index),
+        "vectors": count,
+        "k": k,
+        "queries": len(sample),
+        "recall_at_k": round(float(recall), 4),
+        "latency_ms_p50": round(float(np.percentile(ann_latencies, 50)), 3),
+        "latency_ms_p95": round(float(np.percentile(ann_latencies, 95)), 3),
+        "exact_latency_ms_p50": round(float(np.percentile(exact_latencies, 50)), 3),
+        "exact_latency_ms_p95": round(float(np.percentile(exact_latencies, 95)), 3),
+    }
+
+
+def compute_settings_key(chunk_size, chunk_overlap, separator, model_name):
+    """
+    Build the cache key for the index settings
+    Any change to the chunking parameters or the embedding model produces a
+    different key, which forces a rebuild.
+    """
+    settings = json.dumps([chunk_size, chunk_overlap, separator, model_name]).encode()
+    return hashlib.sha256(settings).hexdigest()[:32]
+
+
+def file_sha256(path):
+    """Hash a file's content without reading it into memory at once"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def save_index(vectorstore, index_dir, meta=None):
+    """
+    Save a FAISS vector store and its docstore to index_dir
+    Files are written to a temporary directory first so a crash never leaves
+    a half-written index behind. Older indexes next to it are removed.
+    """
+    parent_dir = os.path.dirname(index_dir)
+    os.makedirs(parent_dir, exist_ok=True)
+    tmp_dir = index_dir + ".tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    faiss.write_index(vectorstore.index, os.path.join(tmp_dir, INDEX_FILE))
+    with open(os.path.join(tmp_dir, DOCSTORE_FILE), "wb") as f:
+        pickle.dump((vectorstore.docstore, vectorstore.index_to_docstore_id), f)
+    with open(os.path.join(tmp_dir, META_FILE), "w") as f:
+        json.dump(meta or {}, f)
+
+    shutil.rmtree(index_dir, ignore_errors=True)
+    os.replace(tmp_dir, index_dir)
+
+    # Indexes built with an old key are never used again
+    for name in os.listdir(parent_dir):
+        path = os.path.join(parent_dir, name)
+        if path != index_dir and os.path.isdir(path):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def load_index(index_dir, embeddings):
+    """
+    Load a persisted FAISS vector store, or return None if there is none
+    The index is read into memory, so documents can be added to or removed
+    from it.
+    """
+    index_path = os.path.join(index_dir, INDEX_FILE)
+    docstore_path = os.path.join(index_dir, DOCSTORE_FILE)
+    if not (os.path.exists(index_path) and os.path.exists(docstore_path)):
+        return None
+
+    index = faiss.read_index(index_path)
+
+    # The docstore is our own file, written by save_index
+    with open(docstore_path, "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+
+    return FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=docstore,
+        index_to_docstore_id=index_to_docstore_id,
+    )
+
+
+def load_index_meta(index_dir):
+    """Return the meta dict saved with an index, or {} if there is none"""
+    meta_path = os.path.join(index_dir, META_FILE)
+    if not os.path.exists(meta_path):
+        return {}
+    with open(meta_path) as f:
+        return json.load(f)
@@ -0,0 +1,187 @@
+import hashlib
+import math
+import random
+import re
+import threading
+from datetime import date, datetime, timedelta, timezone
+
+
+# Companies the synthetic market knows by name. Base prices match the local
+# sample portfolio and trade history in MockStockModel.
+COMPANIES = {
+    "AAPL": {"name": "Apple Inc.", "industry": "Technology", "exchange": "NASDAQ", "country": "US",
+             "webUrl": "https://www.apple.com", "price": 180.00},
+    "GOOGL": {"name": "Alphabet Inc.", "industry": "Communication Services", "exchange": "NASDAQ", "country": "US",
+              "webUrl": "https://abc.xyz", "price": 2850.00},
+    "MSFT": {"name": "Microsoft Corporation", "industry": "Technology", "exchange": "NASDAQ", "country": "US",
+             "webUrl": "https://www.microsoft.com", "price": 415.00},
+    "TSLA": {"name": "Tesla, Inc.", "industry": "Automobiles", "exchange": "NASDAQ", "country": "US",
+             "webUrl": "https://www.tesla.com", "price": 200.00},
+    "AMZN": {"name": "Amazon.com, Inc.", "industry": "Retail", "exchange": "NASDAQ", "country": "US",
+             "webUrl": "https://www.amazon.com", "price": 3400.00},
+    "NFLX": {"name": "Netflix, Inc.", "industry": "Media", "exchange": "NASDAQ", "country": "US",
+             "webUrl": "https://www.netflix.com", "price": 500.00},
+    "META": {"name": "Meta Platforms, Inc.", "industry": "Communication Services", "exchange": "NASDAQ",
+             "country": "US", "webUrl": "https://about.meta.com", "price": 280.00},
+    "NVDA": {"name": "NVIDIA Corporation", "industry": "Semiconductors", "exchange": "NASDAQ", "country": "US",
+             "webUrl": "https://www.nvidia.com", "price": 750.00},
+}
+
+SYMBOL_PATTERN = re.compile(r"[A-Z][A-Z0-9.]{0,9}")
+
+# The walk starts here, and every symbol trades at its base price on ANCHOR_DAY
+EPOCH = date(2010, 1, 1)
+ANCHOR_DAY = date(2025, 1, 2)
+
+
+class SyntheticMarket:
+    """
+    Deterministic synthetic prices for any ticker
+
+    Each symbol follows its own random walk of daily closes, seeded by the
+    symbol, so every process (the app, the mock backend server, a benchmark)
+    sees the same history. Any well-formed symbol can be priced. Profiles,
+    descriptions and name search only cover the companies in COMPANIES.
+    """
+
+    def __init__(self, daily_volatility=0.018, daily_drift=0.0003):
+        self.daily_volatility = daily_volatility
+        self.daily_drift = daily_drift
+        self._walks = {}   # symbol -> list of log closes, one per day since EPOCH
+        self._lock = threading.Lock()
+
+    def is_valid_symbol(self, symbol):
+        return bool(symbol) and SYMBOL_PATTERN.fullmatch(symbol) is not None
+
+    def base_price(self, symbol):
+        if symbol in COMPANIES:
+            return COMPANIES[symbol]["price"]
+        # Unknown symbols get a stable price between 10 and 500
+        return round(10 + _unit(symbol, "price") * 490, 2)
+
+    def close(self, symbol, day):
+        """Closing price of a symbol on a day (the previous close on weekends)"""
+        return round(math.exp(self._log_closes(symbol, day)[(day - EPOCH).days]), 2)
+
+    def current_price(self, symbol, now=None):
+        """
+        Price right now: the last close plus a small move that changes every minute
+        """
+        now = now or datetime.now()
+        minute = int(now.timestamp() // 60)
+        move = (_unit(symbol, minute) - 0.5) * 0.01
+        return round(self.close(symbol, now.date()) * (1 + move), 2)
+
+    def history(self, symbol, start_day, end_day):
+        """
+        Daily bars for the trading days between two dates (inclusive)
+        Returns a list of dicts with date, open, high, low, close and volume,
+        shaped like the records of the yahoo-history API.
+        """
+        start_day, end_day = _to_date(start_day), _to_date(end_day)
+        start_day = max(start_day, EPOCH + timedelta(days=1))
+        if end_day < start_day:
+            return []
+        log_closes = self._log_closes(symbol, end_day)
+
+        bars = []
+        day = start_day
+        while day <= end_day:
+            if day.weekday() < 5:
+                index = (day - EPOCH).days
+                close = math.exp(log_closes[index])
+                open_price = math.exp(log_closes[index - 1])
+                spread = 1 + _unit(symbol, day, "range") * 0.015
+                bars.append({
+                    "date": f"{day.isoformat()}T00:00:00Z",
+                    "open": round(open_price, 2),
+                    "high": round(max(open_price, close) * spread, 2),
+                    "low": round(min(open_price, close) / spread, 2),
+                    "close": round(close, 2),
+                    "volume": int(1_000_000 + _unit(symbol, day, "volume") * 9_000_000),
+                })
+            day += timedelta(days=1)
+        return bars
+
+    def history_bars(self, symbol, start_day=None, end_day=None):
+        """
+        History in the format of MockStockModel.get_stock_history
+        Returns (timestamp_ms, close) tuples, timestamps at midnight UTC.
+        Defaults to the last 52 weeks.
+        """
+        end_day = _to_date(end_day) if end_day else date.today()
+        start_day = _to_date(start_day) if start_day else end_day - timedelta(days=365)
+        return [
+            (int(datetime.fromisoformat(bar["date"][:10]).replace(tzinfo=timezone.utc).timestamp() * 1000), bar["close"])
+            for bar in self.history(symbol, start_day, end_day)
+        ]
+
+    def profile(self, symbol):
+        """Company profile for a known symbol, or None"""
+        company = COMPANIES.get(symbol)
+        if company is None:
+            return None
+        return {
+            "name": company["name"],
+            "industry": company["industry"],
+            "logoUrl": "",
+            "exchange": company["exchange"],
+            "webUrl": company["webUrl"],
+            "country": company["country"],
+        }
+
+    def description(self, symbol):
+        """Company description for a known symbol, or None"""
+        company = COMPANIES.get(symbol)
+        if company is None:
+            return None
+        return (f"{company['name']} is a {company['industry'].lower()} company listed on "
+                f"{company['exchange']} under the ticker {symbol}. This description is synthetic test data.")
+
+    def search(self, name):
+        """Return the symbol of the first company whose name or symbol contains `name`, or None"""
+        name = name.strip().lower()
+        if not name:
+            return None
+        for symbol, company in COMPANIES.items():
+            if name == symbol.lower() or name in company["name"].lower():
+                return symbol
+        return None
+
+    def _log_closes(self, symbol, last_day):
+        """Log closes of a symbol from EPOCH up to at least last_day, extended as needed"""
+        needed = (last_day - EPOCH).days + 1
+        with self._lock:
+            walk = self._walks.get(symbol)
+            if walk is None or len(walk) < needed:
+                walk = self._build_walk(symbol, max(needed, (date.today() - EPOCH).days + 1))
+                self._walks[symbol] = walk
+            return walk
+
+    def _build_walk(self, symbol, days):
+        rng = random.Random(f"synthetic-market:{symbol}")
+        log_closes = [0.0]
+        for offset in range(1, days):
+            step = 0.0
+            if (EPOCH + timedelta(days=offset)).weekday() < 5:
+                step = rng.gauss(self.daily_drift, self.daily_volatility)
+            log_closes.append(log_closes[-1] + step)
+
+        # Shift the walk so the symbol trades at its base price on ANCHOR_DAY
+        anchor = min((ANCHOR_DAY - EPOCH).days, days - 1)
+        shift = math.log(self.base_price(symbol)) - log_closes[anchor]
+        return [value + shift for value in log_closes]
+
+
+def _unit(*parts):
+    """Stable pseudo-random number in [0, 1) for the given values"""
+    digest = hashlib.sha256("|".join(str(part) for part in parts).encode()).digest()
+    return int.from_bytes(digest[:8], "big") / 2 ** 64
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
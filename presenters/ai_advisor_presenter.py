@@ -1,14 +1,39 @@
-from PySide6.QtCore import QTimer, QPropertyAnimation, QEasingCurve
+from PySide6.QtCore import QPropertyAnimation, QEasingCurve
 from PySide6.QtWidgets import QFrame
 from PySide6.QtCore import QObject, QThread, Signal
 
+from models.mock_stock_model import AdviceCancelToken
+
+
+class AIAdvisorPresenter(QObject):
+    # Emitted from the RAG init thread, delivered on the GUI thread
+    ragStateChanged = Signal(str)
 
-class AIAdvisorPresenter:
     def __init__(self, view, model):
         """Connect the View to the model and control the AI analysis logic"""
+        super().__init__()
         self.view = view
         self.model = model
         self.current_query = ""  # Add this to store the current query
+        # Each question gets an ID - results from older ones are dropped
+        self.request_id = 0
+        self.workers = {}
+        self.received_first_token = False
+
+        # Show the knowledge base loading state in the view
+        self.ragStateChanged.connect(self.view.update_rag_status)
+        self.model.add_rag_state_listener(self.ragStateChanged.emit)
+
+    def refresh_rag_status(self):
+        """Push the current knowledge base state to the view and make sure it and the LLM are loading"""
+        self.view.update_rag_status(self.model.rag_state)
+        self.model.start_rag_init()
+        self.model.warm_up_llm()
+
+    def close(self):
+        """Stop listening to the model and abort any question in flight when the window closes"""
+        self.model.remove_rag_state_listener(self.ragStateChanged.emit)
+        self.cancel_analysis()
 
     def set_query(self, query):
         """Store the query for processing"""
@@ -16,31 +41,105 @@ class AIAdvisorPresenter:
         print(f"AIAdvisorPresenter: Query set to: {self.current_query}")
 
     def run_ai_analysis(self):
-        """Run AI analysis - update analysis button, simulate delay, and return new insight"""
-        # Update button status via View
-        self.view.update_analysis_button_text("🔄 Analyzing...")
-        self.view.set_analysis_button_enabled(False)
+        """Run AI analysis - update analysis button and stream the new insight into the view"""
+        # A new question supersedes the one still being answered
+        self._cancel_current(show_stopped=True)
+        self.request_id += 1
+        
+        # While analyzing, the button stops the request instead of sending
+        self.view.update_analysis_button_text("⏹")
+        self.view.set_analysis_button_enabled(True)
         
-        # Show the loading indicator instead of the loading bar
+        # Show the loading indicator until the first token arrives
         self.view.show_loading_indicator()
-    
-        # Simulate delay and then finish analysis
-        QTimer.singleShot(2000, self.finish_analysis)
-
-    def finish_analysis(self):
-        """Send the AI insight from the model to update the View"""
-        # Use the stored query instead of getting it from the input field
-        print(f"AIAdvisorPresenter: Processing query: {self.current_query}")
+        self.received_first_token = False
         
-        # Get AI advice from model
-        new_insight = self.model.get_ai_advice(self.current_query)
+        # Use the stored query instead of getting it from the input field
+        print(f"AIAdvisorPresenter: Processing query #{self.request_id}: {self.current_query}")
         
-        # Hide the loading indicator instead of loading bar
+        # Stream the answer from a worker thread so the UI stays responsive
+        worker = AdviceStreamWorker(self.model, self.current_query, self.request_id)
+        worker.tokenReceived.connect(self.append_token)
+        worker.streamFinished.connect(self.finish_analysis)
+        # Keep a reference until the thread has exited, even after it is superseded
+        self.workers[self.request_id] = worker
+        worker.finished.connect(lambda request_id=self.request_id: self._worker_exited(request_id))
+        worker.start()
+
+    def is_analyzing(self):
+        """Whether a question is currently being answered"""
+        return self.request_id in self.workers and not self.workers[self.request_id].cancel_token.cancelled
+
+    def cancel_analysis(self):
+        """Stop the question in flight and reset the view"""
+        if self._cancel_current(show_stopped=True):
+            self._reset_view()
+
+    def _cancel_current(self, show_stopped=False):
+        """Abort the current request. Returns True if one was running."""
+        if not self.is_analyzing():
+            return False
+        print(f"AIAdvisorPresenter: Cancelling query #{self.request_id}")
+        self.workers[self.request_id].cancel()
+        if show_stopped and self.received_first_token:
+            self.view.append_to_streaming_insight(" …")
+        # Drop anything the cancelled request still emits
+        self.request_id += 1
+        return True
+
+    def _worker_exited(self, request_id):
+        worker = self.workers.pop(request_id, None)
+        if worker is not None:
+            worker.deleteLater()
+
+    def append_token(self, request_id, token):
+        """Append a streamed piece of the answer to the advisor message"""
+        if request_id != self.request_id:
+            # Late token from a cancelled or superseded question
+            return
+        if not self.received_first_token:
+            self.received_first_token = True
+            self.view.hide_loading_indicator()
+            self.view.start_streaming_insight()
+        self.view.append_to_streaming_insight(token)
+
+    def finish_analysis(self, request_id):
+        """Reset the view once the whole answer has arrived"""
+        if request_id != self.request_id:
+            return
+        # Mark as done so is_analyzing() returns False
+        self.request_id += 1
+        self._reset_view()
+
+    def _reset_view(self):
         self.view.hide_loading_indicator()
-        
-        # Update the view with new insight
-        self.view.add_new_insight(new_insight)
+        self.view.finish_streaming_insight()
         self.view.update_analysis_button_text("🔍 Send")
         self.view.set_analysis_button_enabled(True)
         self.view.update_last_refresh()
 
+
+class AdviceStreamWorker(QThread):
+    """Worker thread that streams the AI advice for one question from the model"""
+    tokenReceived = Signal(int, str)   # request_id, token
+    streamFinished = Signal(int)       # request_id
+
+    def __init__(self, model, query, request_id):
+        super().__init__()
+        self.model = model
+        self.query = query
+        self.request_id = request_id
+        self.cancel_token = AdviceCancelToken()
+
+    def cancel(self):
+        """Abort the HTTP request. Safe to call from the GUI thread."""
+        self.cancel_token.cancel()
+
+    def run(self):
+        try:
+            for token in self.model.stream_ai_advice(self.query, cancel_token=self.cancel_token):
+                if self.cancel_token.cancelled:
+                    break
+                self.tokenReceived.emit(self.request_id, token)
+        finally:
+            self.streamFinished.emit(self.request_id)
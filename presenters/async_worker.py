@@ -0,0 +1,92 @@
+import asyncio
+import itertools
+import threading
+
+from PySide6.QtCore import QObject, Signal
+
+
+class AsyncLoopThread(QObject):
+    """
+    Runs one asyncio event loop on a background thread for the whole app
+
+    Presenters submit coroutines (e.g. AsyncStockModel.get_stock_history_async)
+    instead of starting a QThread per action. Results come back through Qt
+    signals, so callbacks always run on the GUI thread.
+    """
+    resultReady = Signal(int, object)   # request_id, result
+    errorOccurred = Signal(int, str)    # request_id, error message
+
+    _instance = None
+
+    def __init__(self):
+        super().__init__()
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run_loop, name="async-model-loop", daemon=True)
+        self._ids = itertools.count(1)
+        self._callbacks = {}
+        self._futures = {}
+
+        self.resultReady.connect(self._dispatch_result)
+        self.errorOccurred.connect(self._dispatch_error)
+        self._thread.start()
+
+    @classmethod
+    def instance(cls):
+        """Return the shared loop thread, creating it on first use"""
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro, on_result=None, on_error=None):
+        """
+        Schedule a coroutine on the loop
+        Returns a request ID that can be passed to cancel().
+        """
+        request_id = next(self._ids)
+        self._callbacks[request_id] = (on_result, on_error)
+
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        self._futures[request_id] = future
+
+        def done(f):
+            # Runs on the loop thread - hand the result over with a signal
+            if f.cancelled():
+                # Only cancel() cancels futures, and it already dropped the callbacks
+                return
+            if f.exception() is not None:
+                self.errorOccurred.emit(request_id, str(f.exception()))
+            else:
+                self.resultReady.emit(request_id, f.result())
+
+        future.add_done_callback(done)
+        return request_id
+
+    def cancel(self, request_id):
+        """Cancel a pending coroutine. Its callbacks will not be called."""
+        self._callbacks.pop(request_id, None)
+        future = self._futures.pop(request_id, None)
+        if future is not None:
+            future.cancel()
+
+    def stop(self):
+        """Stop the event loop and wait for the thread to exit"""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=2)
+
+    def _dispatch_result(self, request_id, result):
+        self._futures.pop(request_id, None)
+        on_result, _ = self._callbacks.pop(request_id, (None, None))
+        if on_result:
+            on_result(result)
+
+    def _dispatch_error(self, request_id, message):
+        self._futures.pop(request_id, None)
+        _, on_error = self._callbacks.pop(request_id, (None, None))
+        if on_error:
+            on_error(message)
+        else:
+            print(f"AsyncLoopThread: request {request_id} failed: {message}")
@@ -1,7 +1,10 @@
 from PySide6.QtCore import QObject, Signal, QThread,QByteArray
 import requests
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from io import BytesIO
 from PySide6.QtGui import QPixmap
+from models.quote_cache import EstimatedPrice
 
 class WorkerThread(QThread):
     """Worker thread for API calls"""
@@ -20,10 +23,13 @@ class WorkerThread(QThread):
 
 class BuyOrderPresenter(QObject):
     # Signals for thread-safe UI updates
-    stockFoundSignal = Signal(str, float, str, list)
     stockNotFoundSignal = Signal(str, str)
     loadingStartedSignal = Signal(str)
     loadingFinishedSignal = Signal()
+    # Partial search results: search_id, symbol, data
+    stockPriceReadySignal = Signal(int, str, float, bool)   # ..., price, whether it is a live quote
+    stockChartReadySignal = Signal(int, str, list)
+    stockCompanyReadySignal = Signal(int, str, dict, str)
     
     def __init__(self, view, model):
         super().__init__()
@@ -34,12 +40,18 @@ class BuyOrderPresenter(QObject):
             "price": 0.0,
             "chart_data": []
         }
+        # Max seconds to wait for the stock details after a symbol is found
+        self.search_deadline = 15.0
+        # Partial results from older searches are ignored
+        self.search_id = 0
         
         # Connect signals to view methods
-        self.stockFoundSignal.connect(self.view.stock_found)
         self.stockNotFoundSignal.connect(self.view.stock_not_found)
         self.loadingStartedSignal.connect(lambda msg: self.view.set_loading_state(True, msg))
         self.loadingFinishedSignal.connect(lambda: self.view.set_loading_state(False))
+        self.stockPriceReadySignal.connect(self._price_ready)
+        self.stockChartReadySignal.connect(self._chart_ready)
+        self.stockCompanyReadySignal.connect(self._company_ready)
         
         # Initialize the view
         self.load_user_data()
@@ -67,18 +79,35 @@ class BuyOrderPresenter(QObject):
         self.loadingStartedSignal.emit(f"Searching for {company_name}...")
         
         # Create a worker thread for the API call
-        self.worker = WorkerThread(self.search_stock_worker, company_name)
+        self.search_id += 1
+        self.worker = WorkerThread(self.search_stock_worker, company_name, self.search_id)
         self.worker.finished.connect(self._search_completed)
         self.worker.start()
     
+    def _price_ready(self, search_id, symbol, price, live):
+        """Show the price as soon as it arrives"""
+        if search_id == self.search_id:
+            self.view.update_price_partial(symbol, price, live)
+    
+    def _chart_ready(self, search_id, symbol, chart_data):
+        """Draw the chart as soon as the history arrives"""
+        if search_id == self.search_id:
+            self.view.update_chart_partial(symbol, chart_data)
+    
+    def _company_ready(self, search_id, symbol, profile, description):
+        """Fill in the company card once profile and description are both back"""
+        if search_id == self.search_id:
+            self.view.update_company_partial(symbol, profile, description)
     
     def _search_completed(self, result):
         """Handle the search result from the worker thread"""
-        # DO NOT hide loading indicator yet - keep it animating
+        if result.get("search_id") != self.search_id:
+            # A newer search has started since this one
+            return
         
         if result["success"]:
-            # Stock was found - pass all data to the view
-            self.view.update_ui_with_all_data(result)
+            # Every part has already been shown - just end the loading state
+            self.view.finish_stock_search()
         else:
             # Stock was not found
             company_name = result["company_name"]
@@ -93,8 +122,11 @@ class BuyOrderPresenter(QObject):
     def process_buy_order(self, stock, quantity):
         """Process the buy order through the model"""
         try:
-            # Get current price for the stock
-            float_price = self.model.get_current_price(stock)
+            # Orders must not use a stale cached price
+            float_price = self.model.get_current_price(stock, allow_stale=False)
+            if isinstance(float_price, EstimatedPrice):
+                self.view.show_error_message(f"No live price for {stock} right now. Please try again later.")
+                return False
             
             # Execute buy through model
             success = self.model.buy_stock(stock, quantity, float_price)
@@ -133,32 +165,107 @@ class BuyOrderPresenter(QObject):
             self.view.show_error_message(f"Error generating preview: {str(e)}")
             return False
     
-    def search_stock_worker(self, company_name):
-        """Worker function that runs in a separate thread"""
+    def search_stock_worker(self, company_name, search_id=0):
+        """
+        Worker function that runs in a separate thread
+        Each part of the result is sent to the view as soon as it arrives.
+        """
         # Search for the stock symbol
         success, symbol, error_message = self.model.search_symbol_by_name(company_name)
         
         if success and symbol:
-            # Get current price and chart data
-            price = self.model.get_current_price(symbol)
-            chart_data = self.model.get_stock_history(symbol)
+            received = {}
             
-            # Get additional company information
-            company_profile = self.model.get_company_profile(symbol)
-            company_description = self.model.get_company_description(symbol)
+            def part_ready(part, value):
+                received[part] = value
+                if part == "price":
+                    # Placeholders and estimates are shown, but can't be ordered at
+                    self.stockPriceReadySignal.emit(search_id, symbol, float(value or 0.0), self._is_live_price(value))
+                elif part == "chart_data":
+                    self.stockChartReadySignal.emit(search_id, symbol, value)
+                elif "profile" in received and "description" in received:
+                    self.stockCompanyReadySignal.emit(
+                        search_id, symbol, received["profile"], received["description"]
+                    )
+            
+            details = self._fetch_stock_details(symbol, part_ready)
+            
+            # Show placeholders for anything that missed the deadline
+            for part, value in details.items():
+                if part not in received:
+                    part_ready(part, value)
             
             return {
                 "success": True,
+                "search_id": search_id,
                 "symbol": symbol,
-                "price": price,
+                "price": details["price"] or 0.0,
+                "live_price": self._is_live_price(details["price"]),
                 "company_name": company_name,
-                "chart_data": chart_data,
-                "profile": company_profile,
-                "description": company_description
+                "chart_data": details["chart_data"],
+                "profile": details["profile"],
+                "description": details["description"]
             }
         else:
             return {
                 "success": False,
+                "search_id": search_id,
                 "company_name": company_name,
                 "error_message": error_message or "Stock not found"
             }
+    
+    @staticmethod
+    def _is_live_price(price):
+        """Whether a price came from a live quote, not a placeholder or an estimate"""
+        return price is not None and not isinstance(price, EstimatedPrice)
+    
+    def _fetch_stock_details(self, symbol, on_part=None):
+        """
+        Get price, chart data, profile and description concurrently
+        The calls don't depend on each other, so the total time is roughly the
+        slowest one. on_part(part, value) is called as each one finishes.
+        Parts that miss the search deadline get placeholder values.
+        """
+        start_time = time.time()
+        details = {
+            "price": None,
+            "chart_data": [],
+            "profile": {"name": symbol},
+            "description": "No company description available."
+        }
+        calls = {
+            "price": self.model.get_current_price,
+            "chart_data": self.model.get_stock_history,
+            "profile": self.model.get_company_profile,
+            "description": self.model.get_company_description,
+        }
+        
+        executor = ThreadPoolExecutor(max_workers=len(calls))
+        try:
+            futures = {executor.submit(call, symbol): part for part, call in calls.items()}
+            pending = set(futures)
+            
+            while pending:
+                remaining = self.search_deadline - (time.time() - start_time)
+                if remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                
+                for future in done:
+                    part = futures[future]
+                    try:
+                        details[part] = future.result()
+                    except Exception as e:
+                        print(f"Error getting {part} for {symbol}: {str(e)}")
+                        continue
+                    if on_part:
+                        on_part(part, details[part])
+            
+            for future in pending:
+                print(f"Getting {futures[future]} for {symbol} missed the {self.search_deadline}s deadline")
+        finally:
+            # Don't block on calls that missed the deadline
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        print(f"Stock details for {symbol} loaded in {time.time() - start_time:.2f} seconds")
+        return details
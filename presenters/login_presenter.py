@@ -39,11 +39,10 @@ class DataLoaderWorker(QObject):
         
         # Preload all current prices for portfolio items (critical for smooth display)
         self.progress_update.emit(85, "Loading stock prices...")
-        for item in portfolio_data:
-            symbol = item.get("symbol")
-            if symbol:
-                # Preload price data (already cached in the model)
-                self.model.get_current_price(symbol)
+        symbols = [item.get("symbol") for item in portfolio_data if item.get("symbol")]
+        # get_portfolio_data has already filled the model's quote cache, so this
+        # only requests prices that are missing or expired
+        self.model.get_current_prices(symbols)
         self.progress_update.emit(95, "Stock prices loaded.")
         
         # Final initialization - ready to show main view
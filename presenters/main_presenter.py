@@ -1,4 +1,5 @@
 from models.mock_stock_model import MockStockModel
+from presenters.async_worker import AsyncLoopThread
 from views.buy_order_view import BuyOrderWindow
 from views.sell_order_view import SellOrderWindow
 from views.ai_advisor_view import AIAdvisorWindow
@@ -11,6 +12,7 @@ class MainPresenter:
         self.view = view
         self.model = model
         self.model.on_data_changed = self.refresh_portfolio_data
+        self._refresh_request_id = None
 
         print(f"MainPresenter.__init__: Received model with username: {model.get_username()}")
 
@@ -122,21 +124,38 @@ class MainPresenter:
     # In your MainPresenter class
     def refresh_portfolio_data(self):
         """Refresh portfolio data in the main view"""
+        if hasattr(self.model, "get_portfolio_data_async"):
+            # Fetch on the shared event loop so the GUI stays responsive
+            loop_thread = AsyncLoopThread.instance()
+            if self._refresh_request_id is not None:
+                loop_thread.cancel(self._refresh_request_id)
+            self._refresh_request_id = loop_thread.submit(
+                self.model.get_portfolio_data_async(),
+                on_result=self._show_refreshed_portfolio,
+                on_error=lambda message: print(f"Error refreshing portfolio data: {message}")
+            )
+            return
+
         try:
             # Get fresh data from the model
             portfolio_data = self.model.get_portfolio_data()
-            
-            # Update the view with new data
-            self.view.update_portfolio_table(portfolio_data)
-            
-            # Update the summary information
-            total_value, total_unrealized_pl = self.model.get_portfolio_total_value()
-            self.view.update_portfolio_summary(total_value, total_unrealized_pl)
-            
-            print("Portfolio data refreshed successfully")
+            self._show_refreshed_portfolio(portfolio_data)
         except Exception as e:
             print(f"Error refreshing portfolio data: {e}")
 
+    def _show_refreshed_portfolio(self, portfolio_data):
+        """Update the table and summary with freshly loaded portfolio data"""
+        self._refresh_request_id = None
+
+        # Update the view with new data
+        self.view.update_portfolio_table(portfolio_data)
+        
+        # Update the summary information from the rows we already have
+        total_value, total_unrealized_pl = self.model.get_portfolio_total_value(portfolio_data)
+        self.view.update_portfolio_summary(total_value, total_unrealized_pl)
+        
+        print("Portfolio data refreshed successfully")
+
     def open_sell_order(self):
         """ Open window for selling stocks """
         self.view.sell_order_window = SellOrderWindow(self.model)
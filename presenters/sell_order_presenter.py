@@ -1,4 +1,5 @@
 from PySide6.QtCore import QObject, Signal, QThread
+from models.quote_cache import EstimatedPrice
 
 class WorkerThread(QThread):
     """Worker thread for API calls"""
@@ -178,8 +179,11 @@ class SellOrderPresenter(QObject):
                 self.view.show_error_message(f"You only own {shares_owned} shares of {symbol}")
                 return False
             
-            # Get current price for the stock
-            float_price = self.model.get_current_price(symbol)
+            # Orders must not use a stale cached price
+            float_price = self.model.get_current_price(symbol, allow_stale=False)
+            if isinstance(float_price, EstimatedPrice):
+                self.view.show_error_message(f"No live price for {symbol} right now. Please try again later.")
+                return False
             
             # Execute sell through model
             success = self.model.sell_stock(symbol, quantity, float_price)
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The app runs from the project root and imports its packages from there
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
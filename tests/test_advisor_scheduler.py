@@ -0,0 +1,71 @@
+import threading
+import time
+
+import pytest
+
+from models.advisor_scheduler import AdvisorQueueFull, AdvisorScheduler
+
+
+def embed(texts):
+    return [[float(len(text))] for text in texts]
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_questions_beyond_the_queue_are_rejected():
+    scheduler = AdvisorScheduler(embed, max_concurrent=1, max_queue=1)
+    scheduler.acquire()
+
+    waiter = threading.Thread(target=scheduler.acquire)
+    waiter.start()
+    wait_until(lambda: scheduler.stats()["waiting"] == 1)
+
+    with pytest.raises(AdvisorQueueFull):
+        scheduler.acquire()
+    assert scheduler.stats()["rejected"] == 1
+
+    scheduler.release()
+    waiter.join(1)
+    assert not waiter.is_alive()
+    assert scheduler.stats()["running"] == 1
+
+
+def test_cancelled_question_leaves_the_queue():
+    from models.mock_stock_model import AdviceCancelToken
+
+    scheduler = AdvisorScheduler(embed, max_concurrent=1, max_queue=1)
+    scheduler.acquire()
+    token = AdviceCancelToken()
+    result = []
+
+    waiter = threading.Thread(target=lambda: result.append(scheduler.acquire(token)))
+    waiter.start()
+    wait_until(lambda: scheduler.stats()["waiting"] == 1)
+    token.cancel()
+    waiter.join(1)
+
+    assert result == [None]
+    assert scheduler.stats()["waiting"] == 0
+
+
+def test_concurrent_queries_are_embedded_together():
+    scheduler = AdvisorScheduler(embed, max_concurrent=4, batch_window_ms=50)
+    scheduler.acquire()   # Another question in flight opens the batch window
+    vectors = {}
+
+    threads = [
+        threading.Thread(target=lambda text=text: vectors.update({text: scheduler.embed_query(text)}))
+        for text in ("a", "bb", "ccc")
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(2)
+
+    assert vectors == {"a": [1.0], "bb": [2.0], "ccc": [3.0]}
+    assert scheduler.stats()["embedding_batches"] < 3
@@ -0,0 +1,27 @@
+from models.history_store import HistoryStore
+
+
+def test_unknown_symbol_needs_the_whole_range():
+    store = HistoryStore(":memory:")
+    assert store.missing_ranges("AAPL", "2025-01-01", "2025-03-01") == [("2025-01-01", "2025-03-01")]
+
+
+def test_only_ranges_outside_the_coverage_are_missing():
+    store = HistoryStore(":memory:")
+    store.save_bars("AAPL", [], "2025-02-01", "2025-02-28")
+
+    # The last stored day is fetched again, since its bar may have been incomplete
+    assert store.missing_ranges("AAPL", "2025-01-01", "2025-03-15") == [
+        ("2025-01-01", "2025-02-01"),
+        ("2025-02-28", "2025-03-15"),
+    ]
+    assert store.missing_ranges("AAPL", "2025-02-05", "2025-02-20") == []
+
+
+def test_coverage_stays_contiguous():
+    store = HistoryStore(":memory:")
+    store.save_bars("AAPL", [], "2025-02-01", "2025-02-28")
+    for range_start, range_end in store.missing_ranges("AAPL", "2025-01-01", "2025-03-15"):
+        store.save_bars("AAPL", [], range_start, range_end)
+
+    assert store.get_coverage("AAPL") == ("2025-01-01", "2025-03-15")
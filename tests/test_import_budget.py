@@ -0,0 +1,24 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+HEAVY_PREFIXES = ("torch", "langchain", "faiss")
+
+
+def test_model_import_does_not_load_rag_stack():
+    """Importing the model must leave torch, langchain and FAISS for start_rag_init"""
+    script = (
+        "import json, sys\n"
+        "import models.mock_stock_model\n"
+        "print(json.dumps(sorted(sys.modules)))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", script], cwd=REPO_ROOT, capture_output=True, text=True, timeout=120
+    )
+    assert result.returncode == 0, result.stderr
+
+    modules = json.loads(result.stdout.strip().splitlines()[-1])
+    heavy = [name for name in modules if name.split(".")[0].startswith(HEAVY_PREFIXES)]
+    assert heavy == []
@@ -0,0 +1,151 @@
+import os
+
+import pytest
+from langchain_core.embeddings import Embeddings
+
+from models.knowledge_base import KnowledgeBase
+
+
+class FakeEmbeddings(Embeddings):
+    """2-d vectors from the text length. Can fail after a number of batches."""
+
+    def __init__(self, fail_after=None, on_batch=None):
+        self.fail_after = fail_after
+        self.on_batch = on_batch
+        self.batches = 0
+
+    def embed_documents(self, texts):
+        self.batches += 1
+        if self.fail_after is not None and self.batches > self.fail_after:
+            raise RuntimeError("embedding failed")
+        if self.on_batch:
+            self.on_batch()
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text):
+        return [float(len(text)), 1.0]
+
+
+def write_doc(folder, number, version="v1", lines=100):
+    path = os.path.join(folder, f"doc{number}.txt")
+    with open(path, "w") as f:
+        f.write("\n".join(f"document {number} {version} line {line}" for line in range(lines)))
+    return os.path.abspath(path)
+
+
+def make_kb(tmp_path, embeddings, docs):
+    return KnowledgeBase([str(docs)], str(tmp_path / "index"), embeddings, chunk_size=300, chunk_overlap=0,
+                         separator="\n", model_name="fake", batch_size=8, parse_workers=1)
+
+
+def index_ids(kb):
+    return set(kb.vectorstore.index_to_docstore_id.values())
+
+
+def manifest_ids(kb):
+    return {doc_id for entry in kb.files.values() for doc_id in entry["ids"]}
+
+
+@pytest.fixture
+def docs(tmp_path):
+    folder = tmp_path / "docs"
+    folder.mkdir()
+    return folder
+
+
+def test_files_are_swapped_in_one_at_a_time(tmp_path, docs):
+    paths = [write_doc(docs, number) for number in range(4)]
+    committed_during_sync = []
+    kb = None
+
+    def on_batch():
+        committed_during_sync.append(sum(path in kb.files for path in paths))
+
+    kb = make_kb(tmp_path, FakeEmbeddings(on_batch=on_batch), docs)
+    stats = kb.sync()
+
+    assert stats["added"] == 4
+    # Earlier files were already in the index while later ones were embedded
+    assert 0 < max(committed_during_sync) < 4
+    assert index_ids(kb) == manifest_ids(kb)
+
+
+def test_failed_sync_leaves_each_file_old_or_new(tmp_path, docs):
+    paths = [write_doc(docs, number) for number in range(4)]
+    embeddings = FakeEmbeddings()
+    kb = make_kb(tmp_path, embeddings, docs)
+    kb.sync()
+    old_entries = {path: dict(kb.files[path]) for path in paths}
+
+    for path in paths:
+        write_doc(docs, paths.index(path), version="v2")
+    embeddings.fail_after = embeddings.batches + 3
+    with pytest.raises(RuntimeError):
+        kb.sync()
+
+    assert index_ids(kb) == manifest_ids(kb)
+    updated = [path for path in paths if kb.files[path]["hash"] != old_entries[path]["hash"]]
+    assert 0 < len(updated) < len(paths)
+    for path in paths:
+        if path not in updated:
+            assert kb.files[path] == old_entries[path]
+
+    # The next sync picks up the files that were not updated
+    embeddings.fail_after = None
+    stats = kb.sync()
+    assert stats["updated"] == len(paths) - len(updated)
+    assert index_ids(kb) == manifest_ids(kb)
+
+
+def test_pool_failures_are_retried_but_rejected_files_are_not(tmp_path, docs, monkeypatch):
+    import models.knowledge_base as knowledge_base
+    from concurrent.futures.process import BrokenProcessPool
+    from models.document_parser import parse_task
+
+    broken_path = write_doc(docs, 0)
+    rejected_path = write_doc(docs, 1)
+
+    def failing_parse_task(path, *args):
+        if path == broken_path:
+            raise BrokenProcessPool("a parse worker died")
+        if path == rejected_path:
+            raise ValueError("not a valid document")
+        return parse_task(path, *args)
+
+    monkeypatch.setattr(knowledge_base, "parse_task", failing_parse_task)
+    kb = make_kb(tmp_path, FakeEmbeddings(), docs)
+    stats = kb.sync()
+
+    assert stats["failed"] == 2 and stats["retrying"] == 1
+    assert broken_path not in kb.files
+    assert kb.files[rejected_path]["ids"] == []
+
+    # Once the pool works again, only the file that hit the pool failure is parsed
+    monkeypatch.setattr(knowledge_base, "parse_task", parse_task)
+    stats = kb.sync()
+    assert stats["added"] == 1
+    assert kb.files[broken_path]["ids"]
+    assert kb.files[rejected_path]["ids"] == []
+    assert index_ids(kb) == manifest_ids(kb)
+
+
+def test_load_reconciles_the_manifest_with_the_index(tmp_path, docs):
+    paths = [write_doc(docs, number) for number in range(2)]
+    kb = make_kb(tmp_path, FakeEmbeddings(), docs)
+    kb.sync()
+
+    # A chunk the manifest claims but the index lost, and one nobody claims
+    kb.files[paths[0]]["ids"].append("lost-chunk")
+    orphan = kb.files[paths[1]]["ids"].pop()
+    kb._save()
+
+    reloaded = make_kb(tmp_path, FakeEmbeddings(), docs)
+    assert reloaded.load()
+    assert orphan not in index_ids(reloaded)
+    assert index_ids(reloaded) == manifest_ids(reloaded)
+    assert reloaded.files[paths[0]]["hash"] is None
+
+    # The file that lost a chunk is indexed again on the next sync
+    stats = reloaded.sync()
+    assert stats["updated"] == 1
+    assert index_ids(reloaded) == manifest_ids(reloaded)
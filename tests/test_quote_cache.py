@@ -0,0 +1,59 @@
+import time
+
+from models.quote_cache import EstimatedPrice, QuoteCache
+
+
+def wait_for_refreshes(cache):
+    cache._refresh_executor.shutdown(wait=True)
+
+
+def test_refresh_that_only_gets_an_estimate_is_a_failure():
+    cache = QuoteCache(ttl=0.0, stale_ttl=60.0)
+    cache.put("AAPL", 180.0)
+    time.sleep(0.01)
+
+    assert cache.get("AAPL", lambda symbol: EstimatedPrice(100.0)) == 180.0
+    wait_for_refreshes(cache)
+
+    stats = cache.stats()
+    assert stats["refreshes"] == 0
+    assert stats["refresh_failures"] == 1
+    assert cache.peek("AAPL")[0] == 180.0
+
+
+def test_fresh_stale_and_expired_entries():
+    cache = QuoteCache(ttl=0.05, stale_ttl=0.1)
+    cache.put("AAPL", 180.0)
+    assert cache.peek("AAPL") == (180.0, "fresh")
+
+    time.sleep(0.07)
+    assert cache.peek("AAPL") == (180.0, "stale")
+
+    time.sleep(0.1)
+    assert cache.peek("AAPL") == (None, None)
+
+
+def test_stale_entry_is_served_while_it_is_refreshed():
+    cache = QuoteCache(ttl=0.0, stale_ttl=60.0)
+    cache.put("AAPL", 180.0)
+    time.sleep(0.01)
+
+    assert cache.get("AAPL", lambda symbol: 181.0) == 180.0
+    wait_for_refreshes(cache)
+    assert cache.peek("AAPL")[0] == 181.0
+    assert cache.stats()["refreshes"] == 1
+
+
+def test_stale_entry_is_reloaded_when_stale_is_not_allowed():
+    cache = QuoteCache(ttl=0.0, stale_ttl=60.0)
+    cache.put("AAPL", 180.0)
+    time.sleep(0.01)
+
+    assert cache.get("AAPL", lambda symbol: 181.0, allow_stale=False) == 181.0
+
+
+def test_estimated_prices_are_not_cached():
+    cache = QuoteCache()
+
+    assert cache.get("AAPL", lambda symbol: EstimatedPrice(100.0)) == 100.0
+    assert cache.peek("AAPL") == (None, None)
@@ -0,0 +1,31 @@
+from models.hybrid_retriever import reciprocal_rank_fusion
+from models.prompt_budget import dedupe_chunks
+
+
+def test_rank_fusion_prefers_ids_found_by_both_rankings():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "d", "a"]])
+
+    assert fused[:2] == ["a", "c"]
+    assert set(fused) == {"a", "b", "c", "d"}
+
+
+def test_rank_fusion_keeps_the_order_of_a_single_ranking():
+    assert reciprocal_rank_fusion([["x", "y", "z"]]) == ["x", "y", "z"]
+
+
+def test_dedupe_drops_contained_chunks():
+    chunks, removed = dedupe_chunks(["the quick brown fox jumps over the lazy dog", "brown fox jumps"])
+
+    assert chunks == ["the quick brown fox jumps over the lazy dog"]
+    assert removed == len("brown fox jumps")
+
+
+def test_dedupe_trims_the_splitter_overlap():
+    overlap = "shared overlap between neighbouring chunks"
+    first = "Value investing starts with a margin of safety. " + overlap
+    second = overlap + " Then diversify across industries."
+
+    chunks, removed = dedupe_chunks([first, second], min_overlap=20)
+
+    assert chunks == [first, "Then diversify across industries."]
+    assert removed == len(overlap)
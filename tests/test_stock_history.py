@@ -0,0 +1,57 @@
+import asyncio
+
+import aiohttp
+import requests
+
+from models.async_stock_model import AsyncStockModel
+from models.history_store import HistoryStore
+from models.mock_stock_model import MockStockModel
+from models.synthetic_market import SyntheticMarket
+
+
+class UnreachableBackend:
+    def get(self, url, **kwargs):
+        raise requests.ConnectionError("backend is down")
+
+
+def offline_model():
+    """A model whose backend can't be reached, without the caches of a real one"""
+    model = MockStockModel.__new__(MockStockModel)
+    model.api_base_url = "http://localhost:5124/api"
+    model.backend = UnreachableBackend()
+    model.history_store = HistoryStore(":memory:")
+    model.synthetic_market = SyntheticMarket()
+    return model
+
+
+def test_stored_bars_are_served_when_the_backend_is_unreachable():
+    model = offline_model()
+    model.history_store.save_bars("AAPL", [("2025-01-02", 1735776000000, 123.45)], "2025-01-01", "2025-01-03")
+
+    # The range reaches past the stored coverage, so a delta fetch is attempted
+    history = model.get_stock_history("AAPL", "2025-01-01", "2025-01-10")
+
+    assert history == [(1735776000000, 123.45)]
+
+
+def test_synthetic_history_is_used_when_nothing_is_stored():
+    model = offline_model()
+
+    history = model.get_stock_history("AAPL", "2025-01-01", "2025-01-10")
+
+    assert history == model.synthetic_market.history_bars("AAPL", "2025-01-01", "2025-01-10")
+
+
+def test_async_history_serves_stored_bars_when_the_backend_is_unreachable():
+    model = AsyncStockModel.__new__(AsyncStockModel)
+    model.__dict__.update(offline_model().__dict__)
+
+    async def unreachable(path, **kwargs):
+        raise aiohttp.ClientConnectionError("backend is down")
+
+    model._get_json_async = unreachable
+    model.history_store.save_bars("AAPL", [("2025-01-02", 1735776000000, 123.45)], "2025-01-01", "2025-01-03")
+
+    history = asyncio.run(model.get_stock_history_async("AAPL", "2025-01-01", "2025-01-10"))
+
+    assert history == [(1735776000000, 123.45)]
@@ -0,0 +1,26 @@
+from models.mock_stock_model import MockStockModel
+from models.quote_cache import EstimatedPrice
+
+
+class RecordingBackend:
+    def __init__(self):
+        self.posts = []
+
+    def post(self, url, **kwargs):
+        self.posts.append(kwargs.get("json"))
+        raise AssertionError("an order must not be sent")
+
+
+def model_without_backend():
+    model = MockStockModel.__new__(MockStockModel)
+    model.api_base_url = "http://localhost:5124/api"
+    model.backend = RecordingBackend()
+    return model
+
+
+def test_orders_at_an_estimated_price_are_refused():
+    model = model_without_backend()
+
+    assert model.buy_stock("AAPL", 1, EstimatedPrice(100.0)) is False
+    assert model.sell_stock("AAPL", 1, EstimatedPrice(100.0)) is False
+    assert model.backend.posts == []
@@ -27,6 +27,7 @@ class AIAdvisorWindow(QWidget):
             print("Error importing AIAdvisorPresenter. Using a simple presenter instead.")
         
         self.init_ui()
+        self.presenter.refresh_rag_status()
         #do full screen
         self.showFullScreen()  # Uncomment to start in full screen mode
 
@@ -103,7 +104,13 @@ class AIAdvisorWindow(QWidget):
         chat_title = QLabel("Investment Advisor Chat")
         chat_title.setStyleSheet("font-size: 16px; font-weight: bold; color: #1F2937;")
         
+        # Knowledge base (RAG) loading state
+        self.rag_status_label = QLabel()
+        self.rag_status_label.setStyleSheet("font-size: 12px; color: #6B7280;")
+        
         chat_header_layout.addWidget(chat_title)
+        chat_header_layout.addStretch()
+        chat_header_layout.addWidget(self.rag_status_label)
         chat_layout.addWidget(chat_header)
         
         # Chat messages area
@@ -263,6 +270,21 @@ class AIAdvisorWindow(QWidget):
         main_layout.addWidget(main_scroll_area)
 
 
+    def update_rag_status(self, state):
+        """Show whether the knowledge base is loading, ready or unavailable"""
+        status_text = {
+            "not_started": "📚 Knowledge base: waiting",
+            "loading": "📚 Knowledge base: loading...",
+            "ready": "📚 Knowledge base: ready",
+            "failed": "📚 Knowledge base: unavailable",
+        }
+        self.rag_status_label.setText(status_text.get(state, ""))
+
+    def closeEvent(self, event):
+        """Stop receiving model updates once the window is closed"""
+        self.presenter.close()
+        super().closeEvent(event)
+
     def show_loading_indicator(self):
         """Show the loading indicator"""
         self.loading_indicator.setVisible(True)
@@ -498,12 +520,17 @@ class AIAdvisorWindow(QWidget):
         spacer = QSpacerItem(40, 20, QSizePolicy.Expanding, QSizePolicy.Minimum)
         message_layout.addItem(spacer)
         
+        # Keep a reference so streamed text can be appended to the bubble
+        message_frame.bubble = bubble
         return message_frame
     
     def send_message(self):
         """Send a user message and get a response with faster animation"""
         user_text = self.input_field.toPlainText().strip()
         if not user_text:
+            # With no new question, the button stops the one being answered
+            if self.presenter.is_analyzing():
+                self.presenter.cancel_analysis()
             return
         
         self.presenter.set_query(user_text)
@@ -539,9 +566,6 @@ class AIAdvisorWindow(QWidget):
         
         # Clear input field
         self.input_field.clear()
-        
-        # Disable send button while processing
-        self.send_button.setEnabled(False)
     
     def keyPressEvent(self, event):
         """Handle key press events for the input field"""
@@ -552,6 +576,11 @@ class AIAdvisorWindow(QWidget):
                 self.send_message()
                 return
         
+        # Escape stops the answer in progress
+        if event.key() == Qt.Key_Escape and self.presenter.is_analyzing():
+            self.presenter.cancel_analysis()
+            return
+        
         super().keyPressEvent(event)
         
     def add_new_insight(self, insight):
@@ -596,7 +625,7 @@ class AIAdvisorWindow(QWidget):
     def update_analysis_button_text(self, text):
         """Update the send button text when analyzing"""
         # If we have an icon, temporarily hide it and show text
-        if text == "🔄 Analyzing...":
+        if text in ("🔄 Analyzing...", "⏹"):
             self.send_button.setIcon(QIcon())
             self.send_button.setText(text)
         else:
@@ -686,6 +715,25 @@ class AIAdvisorWindow(QWidget):
         # Slight delay before starting animation
         QTimer.singleShot(100, animate_message)
 
+    def start_streaming_insight(self):
+        """Add an empty advisor message that streamed text will be appended to"""
+        self.streaming_message = self.create_advisor_message("")
+        self.messages_layout.insertWidget(self.messages_layout.count() - 1, self.streaming_message)
+        QTimer.singleShot(0, self.scroll_to_bottom)
+
+    def append_to_streaming_insight(self, text):
+        """Append a piece of streamed text to the current advisor message"""
+        if getattr(self, "streaming_message", None) is None:
+            self.start_streaming_insight()
+        bubble = self.streaming_message.bubble
+        bubble.setText(bubble.text() + text)
+        # Wait for the layout to grow before scrolling
+        QTimer.singleShot(0, self.scroll_to_bottom)
+
+    def finish_streaming_insight(self):
+        """Stop appending to the current advisor message"""
+        self.streaming_message = None
+
     def update_message_bubbles_width(self, max_width):
         """Update all message bubbles to have the specified max width"""
         # Find all labels in message containers and update their max-width
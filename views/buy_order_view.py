@@ -666,29 +666,6 @@ class BuyOrderWindow(QMainWindow):
         # Call the presenter to search for the stock
         self.presenter.search_stock_by_name(company_name)
     
-    def stock_found(self, symbol, price, company_name, chart_data):
-        """Handle successful stock search - just update price and chart"""
-        # Update UI elements
-        self.stock_display.setText(f"Selected Stock: {symbol}")
-        self.price_display.setText(f"Current Price: ${price:.2f}")
-        
-        # Update total cost
-        self.update_total_cost()
-        
-        # Show success message
-        self.show_success(f"Found: {company_name} ({symbol})")
-        
-        # Update status bar
-        self.status_bar.showMessage(f"Stock found: {company_name} ({symbol}) - Ready to place order")
-        
-        # Enable buttons
-        self.preview_button.setEnabled(True)
-        self.buy_button.setEnabled(True)
-        self.current_price_label.setText(f"Current Price: ${price:.2f}")
-        
-        # Update chart with the data
-        self.update_stock_chart(symbol, chart_data)
-    
     def stock_not_found(self, company_name, error_message=None):
         """Handle case when stock is not found"""
         # Show error message
@@ -764,56 +741,76 @@ class BuyOrderWindow(QMainWindow):
         """Update all UI elements at once"""
         symbol = result["symbol"]
         price = result["price"]
+        live = result.get("live_price", False)
         chart_data = result["chart_data"]
         profile = result.get("profile", {})
         description = result.get("description", "")
         
-        # Create company info content
-        company_info = self._prepare_company_info(symbol, profile, description)
-        
         # Update everything at once
         self.setUpdatesEnabled(False)
         
         try:
-            # Update chart and price info
-            self.stock_display.setText(f"Selected Stock: {symbol}")
-            self.price_display.setText(f"Current Price: ${price:.2f}")
-            self.update_total_cost()
-            self.current_price_label.setText(f"Current Price: ${price:.2f}")
-            self.update_stock_chart(symbol, chart_data)
-            
-            # Replace placeholder with company info
-            for i in range(self.main_layout.count()):
-                item = self.main_layout.itemAt(i)
-                if isinstance(item, QHBoxLayout):
-                    for j in range(item.count()):
-                        widget_item = item.itemAt(j)
-                        if widget_item and widget_item.widget() == self.company_info_placeholder:
-                            old_widget = self.company_info_placeholder
-                            item.replaceWidget(old_widget, company_info)
-                            old_widget.setParent(None)
-                            self.company_info_placeholder = company_info
-                            break
-            
-            # Enable buttons
-            self.preview_button.setEnabled(True)
-            self.buy_button.setEnabled(True)
-            
-            # Show success message
-            self.show_success(f"Found: {profile.get('name', symbol)} ({symbol})")
+            self.update_price_partial(symbol, price, live)
+            self.update_chart_partial(symbol, chart_data)
+            self.update_company_partial(symbol, profile, description)
         finally:
             # Apply all changes at once
             self.setUpdatesEnabled(True)
-            
-            # Turn off loading state
-            self.status_bar.showMessage(f"Stock information loaded")
-            self.set_loading_state(False)
-            
-            # Reset search controls
-            self.stock_search.setEnabled(True)
-            self.stock_search.setReadOnly(False)
-            self.stock_search.clearFocus()
-            QApplication.processEvents()
+            self.finish_stock_search()
+    
+    def update_price_partial(self, symbol, price, live=False):
+        """
+        Show the symbol and price as soon as they are known
+        Buying is only enabled for a live quote, not for a placeholder or an
+        estimated price.
+        """
+        self.stock_display.setText(f"Selected Stock: {symbol}")
+        self.price_display.setText(f"Current Price: ${price:.2f}")
+        self.update_total_cost()
+        self.current_price_label.setText(f"Current Price: ${price:.2f}")
+        
+        # The order can be placed without waiting for the chart or company info
+        self.preview_button.setEnabled(True)
+        self.buy_button.setEnabled(live)
+        if live:
+            self.show_success(f"Found: {symbol}")
+        else:
+            self.show_error(f"Found: {symbol}, but no live price is available yet")
+    
+    def update_chart_partial(self, symbol, chart_data):
+        """Draw the chart once the price history arrives"""
+        self.update_stock_chart(symbol, chart_data)
+    
+    def update_company_partial(self, symbol, profile, description):
+        """Replace the company card placeholder once profile and description arrive"""
+        company_info = self._prepare_company_info(symbol, profile, description)
+        
+        for i in range(self.main_layout.count()):
+            item = self.main_layout.itemAt(i)
+            if isinstance(item, QHBoxLayout):
+                for j in range(item.count()):
+                    widget_item = item.itemAt(j)
+                    if widget_item and widget_item.widget() == self.company_info_placeholder:
+                        old_widget = self.company_info_placeholder
+                        item.replaceWidget(old_widget, company_info)
+                        old_widget.setParent(None)
+                        self.company_info_placeholder = company_info
+                        break
+        
+        if self.buy_button.isEnabled():
+            # Otherwise keep the warning that there is no live price
+            self.show_success(f"Found: {profile.get('name', symbol)} ({symbol})")
+    
+    def finish_stock_search(self):
+        """Turn off the loading state once every part of the search has been shown"""
+        self.status_bar.showMessage(f"Stock information loaded")
+        self.set_loading_state(False)
+        
+        # Reset search controls
+        self.stock_search.setEnabled(True)
+        self.stock_search.setReadOnly(False)
+        self.stock_search.clearFocus()
+        QApplication.processEvents()
    
     def _prepare_company_info(self, symbol, profile, description):
         """Create the company info widget but don't add it to layout yet"""